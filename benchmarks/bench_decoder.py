@@ -0,0 +1,62 @@
+"""Micro-benchmark: compiled block decoder vs. per-field decoding.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_decoder [--rounds 20000] [--register-map extended]
+"""
+
+import argparse
+import random
+import timeit
+
+from custom_components.e3dc.const import DEFAULT_MAX_READ_GAP
+from custom_components.e3dc.modbus import E3DCModbusClient
+from custom_components.e3dc.planner import build_read_plan
+from custom_components.e3dc.registers import load_register_map
+
+
+def _per_field(block, regs):
+    # Bisheriger Weg: pro Feld slicen, nach Typ dispatchen, skalieren
+    data = {}
+    for key, reg in block.fields:
+        offset = reg["addr"] - block.start
+        value = E3DCModbusClient.decode_value(
+            reg,
+            regs[offset:offset + reg["len"]],
+        )
+        scale = reg.get("scale")
+        data[key] = value * scale if scale else value
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20000)
+    parser.add_argument("--register-map", default="simple_mode")
+    args = parser.parse_args()
+
+    rng = random.Random(0xE3DC)
+    cases = []
+    register_map = load_register_map(args.register_map)
+    for group, fields in register_map.groups.items():
+        for block in build_read_plan((fields,), max_gap=DEFAULT_MAX_READ_GAP):
+            regs = [rng.randrange(0x10000) for _ in range(block.count)]
+            if block.decode(regs) != _per_field(block, regs):
+                raise SystemExit(f"Decoder mismatch in {block!r}")
+            cases.append((group, block, regs))
+
+    print(f"{'block':<28} {'per-field us':>13} {'compiled us':>12} {'speedup':>8}")
+    for group, block, regs in cases:
+        old = timeit.timeit(
+            lambda: _per_field(block, regs), number=args.rounds
+        )
+        new = timeit.timeit(lambda: block.decode(regs), number=args.rounds)
+        label = f"{group} {block.start}+{block.count} ({len(block.fields)})"
+        print(
+            f"{label:<28} {old / args.rounds * 1e6:>13.2f} "
+            f"{new / args.rounds * 1e6:>12.2f} {old / new:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
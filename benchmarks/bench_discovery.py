@@ -0,0 +1,132 @@
+"""Network discovery benchmark against several local simulators.
+
+Starts simulators on distinct loopback addresses (127.0.0.x, all
+routed to lo on Linux) and ports, each with a different register
+offset, plus optional decoy servers that accept connections but never
+answer. Then scans the whole /24 with async_scan_network and checks that
+exactly the simulators are found with their offsets.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_discovery --devices 4 --ports 5020 5021
+    python -m benchmarks.bench_discovery --decoys 2 --budget 5
+"""
+
+import argparse
+import asyncio
+import time
+
+from custom_components.e3dc.const import (
+    DISCOVERY_CONCURRENCY,
+    MODE_SIMPLE,
+    PROBE_OFFSETS,
+)
+from custom_components.e3dc.discovery import async_scan_network
+
+from .simulator import E3DCSimulator
+
+NETWORK = "127.0.0.0/24"
+FIRST_HOST = 10
+# Negative Offsets lägen im Simulator unter Rohadresse 0
+OFFSETS = tuple(offset for offset in PROBE_OFFSETS if offset >= 0)
+
+
+async def _silent(reader, writer):
+    # Nimmt Verbindungen an, antwortet aber nie (fremder Dienst)
+    try:
+        await reader.read()
+    finally:
+        writer.close()
+
+
+async def run(args):
+    simulators = []
+    decoys = []
+    expected = set()
+
+    for i in range(args.devices):
+        host = f"127.0.0.{FIRST_HOST + i}"
+        port = args.ports[i % len(args.ports)]
+        offset = OFFSETS[i % len(OFFSETS)]
+        simulators.append(
+            await E3DCSimulator(
+                host=host,
+                port=port,
+                register_offset=offset,
+                latency=args.latency,
+            ).start()
+        )
+        expected.add((host, port, offset))
+
+    for i in range(args.decoys):
+        host = f"127.0.0.{FIRST_HOST + args.devices + i}"
+        decoys.append(
+            await asyncio.start_server(_silent, host, args.ports[0])
+        )
+
+    try:
+        start = time.perf_counter()
+        found = await async_scan_network(
+            NETWORK,
+            ports=args.ports,
+            concurrency=args.concurrency,
+        )
+        elapsed = time.perf_counter() - start
+    finally:
+        for simulator in simulators:
+            await simulator.stop()
+        for decoy in decoys:
+            decoy.close()
+            await decoy.wait_closed()
+
+    result = {
+        (host, port, probe[1])
+        for host, port, probe in found
+        if probe[0] == MODE_SIMPLE
+    }
+    return elapsed, found, result, expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=4)
+    parser.add_argument("--decoys", type=int, default=1)
+    parser.add_argument("--ports", type=int, nargs="+", default=[5020])
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument(
+        "--concurrency", type=int, default=DISCOVERY_CONCURRENCY
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=5.0,
+        help="max. scan time for the /24 (seconds)",
+    )
+    args = parser.parse_args()
+
+    elapsed, found, result, expected = asyncio.run(run(args))
+
+    probes = 254 * len(args.ports)
+    print(f"network           {NETWORK} x {len(args.ports)} port(s)")
+    print(f"probes            {probes}")
+    print(f"found             {len(found)} / {len(expected)} expected")
+    for host, port, probe in found:
+        print(f"  {host}:{port:<6} mode {probe[0]} offset {probe[1]}")
+    print(f"scan time         {elapsed:.2f} s")
+
+    failed = []
+    if result != expected:
+        failed.append(
+            f"missing {sorted(expected - result)}, "
+            f"unexpected {sorted(result - expected)}"
+        )
+    if elapsed > args.budget:
+        failed.append(f"scan took {elapsed:.2f}s > budget {args.budget}s")
+    for line in failed:
+        print(f"FAILED {line}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
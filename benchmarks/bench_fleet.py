@@ -0,0 +1,104 @@
+"""Fleet scheduling benchmark with many simulated E3/DC systems.
+
+Starts N in-process simulators, registers one coordinator per simulator
+with the shared FleetScheduler and reports how the poll starts are
+spread over the interval, the peak number of concurrent polls and the
+per-system poll lag.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_fleet --systems 12 --duration 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.e3dc.coordinator import E3DCCoordinator
+from custom_components.e3dc.modbus import E3DCModbusClient
+from custom_components.e3dc.scheduler import async_get_scheduler
+
+from .simulator import E3DCSimulator
+
+
+async def run(args):
+    hass = HomeAssistant(tempfile.mkdtemp(prefix="e3dc-fleet-"))
+    scheduler = async_get_scheduler(hass)
+
+    simulators = [
+        await E3DCSimulator(latency=args.latency, jitter=args.jitter).start()
+        for _ in range(args.systems)
+    ]
+
+    starts = []
+    lags = {}
+    peak = 0
+    clients = []
+
+    for index, simulator in enumerate(simulators):
+        client = E3DCModbusClient("127.0.0.1", simulator.port)
+        clients.append(client)
+        coordinator = E3DCCoordinator(
+            hass=hass,
+            client=client,
+            scan_interval=args.scan_interval,
+            entry_id=f"system_{index}",
+        )
+        update = coordinator._async_update_data
+
+        async def _timed_update(update=update, coordinator=coordinator):
+            nonlocal peak
+            starts.append(time.time())
+            peak = max(peak, scheduler.active_polls)
+            lags.setdefault(coordinator.name, []).append(coordinator.poll_lag)
+            return await update()
+
+        coordinator._async_update_data = _timed_update
+        coordinator.name = f"system_{index}"
+        scheduler.async_register(coordinator.name, coordinator)
+
+    await asyncio.sleep(args.duration)
+
+    for index in range(args.systems):
+        scheduler.async_unregister(f"system_{index}")
+    for client in clients:
+        await client.close()
+    for simulator in simulators:
+        await simulator.stop()
+
+    return starts, lags, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--systems", type=int, default=12)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--scan-interval", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    args = parser.parse_args()
+
+    starts, lags, peak = asyncio.run(run(args))
+
+    # Verteilung der Startzeitpunkte innerhalb des Intervalls
+    buckets = [0] * args.systems
+    for start in starts:
+        position = (start % args.scan_interval) / args.scan_interval
+        buckets[min(int(position * args.systems), args.systems - 1)] += 1
+
+    print(f"polls                  {len(starts)}")
+    print(f"peak concurrent polls  {peak}")
+    print(f"start distribution     {buckets}")
+    for name, values in sorted(lags.items()):
+        print(
+            f"{name:<22} lag mean {statistics.mean(values) * 1000:7.1f} ms"
+            f"  max {max(values) * 1000:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Import-time benchmark for the integration's entry points.
+
+Imports each module of the integration in a fresh interpreter with
+``python -X importtime``, with the Home Assistant core modules that are
+always loaded before a custom integration already imported, and reports
+the median cumulative import time per entry point. Fails if an entry
+point exceeds the budget or pulls in a transport or recorder module
+that must only be imported on demand.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_import --runs 7 --budget 25
+    python -m benchmarks.bench_import --save baseline.json
+    python -m benchmarks.bench_import --baseline baseline.json
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Von Home Assistant bereits geladen, bevor die Integration importiert
+# wird; zählen nicht zum Budget
+PRELOAD = (
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.update_coordinator",
+    "homeassistant.helpers.entity_platform",
+    "homeassistant.components.sensor",
+    "homeassistant.components.binary_sensor",
+    "homeassistant.components.switch",
+    "voluptuous",
+)
+
+ENTRY_POINTS = (
+    "custom_components.e3dc",
+    "custom_components.e3dc.config_flow",
+    "custom_components.e3dc.sensor",
+    "custom_components.e3dc.binary_sensor",
+    "custom_components.e3dc.switch",
+    "custom_components.e3dc.diagnostics",
+)
+
+# Dürfen erst beim Anlegen eines Clients bzw. bei aktivierter Option
+# importiert werden
+FORBIDDEN = (
+    "pymodbus",
+    "py3rijndael",
+    "homeassistant.components.recorder",
+)
+
+# Erlaubte Verschlechterung gegenüber der Baseline
+REGRESSION_TOLERANCE = 0.3
+
+
+def parse_importtime(stderr):
+    """Return {module: cumulative µs} from -X importtime output."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        times[fields[2].strip()] = int(fields[1])
+    return times
+
+
+def measure(module):
+    code = "\n".join(
+        (
+            f"import {', '.join(PRELOAD)}",
+            "import sys",
+            "sys.stderr.write('--\\n')",
+            f"import {module}",
+        )
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if proc.returncode:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr}")
+    # Nur die Zeilen nach dem Vorladen der HA-Module
+    _, _, stderr = proc.stderr.partition("--\n")
+    return parse_importtime(stderr)
+
+
+def run(args):
+    result = {}
+    offenders = {}
+    for module in args.modules:
+        # Erster Lauf erzeugt ggf. veraltete .pyc-Dateien neu
+        measure(module)
+        samples = []
+        for _ in range(args.runs):
+            times = measure(module)
+            samples.append(times.get(module, 0) / 1000)
+            loaded = [
+                name
+                for name in times
+                if any(
+                    name == heavy or name.startswith(f"{heavy}.")
+                    for heavy in FORBIDDEN
+                )
+            ]
+            if loaded:
+                offenders[module] = sorted(loaded)
+        result[module] = statistics.median(samples)
+    return result, offenders
+
+
+def compare(result, baseline):
+    failed = []
+    for key, value in result.items():
+        if not baseline.get(key):
+            continue
+        if value > baseline[key] * (1 + REGRESSION_TOLERANCE):
+            failed.append(f"{key}: {value:.2f} > baseline {baseline[key]:.2f}")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=25.0,
+        help="max. cumulative import time per entry point (ms)",
+    )
+    parser.add_argument("--modules", nargs="+", default=list(ENTRY_POINTS))
+    parser.add_argument("--save", help="write results as JSON baseline")
+    parser.add_argument("--baseline", help="fail on regression vs. JSON")
+    args = parser.parse_args()
+
+    result, offenders = run(args)
+
+    failed = []
+    for module, value in result.items():
+        print(f"{module:<40} {value:>8.2f} ms")
+        if value > args.budget:
+            failed.append(f"{module}: {value:.2f} ms > budget {args.budget}")
+    for module, loaded in offenders.items():
+        failed.append(f"{module} imports {', '.join(loaded[:3])}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(result, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            failed += compare(result, json.load(file))
+
+    for line in failed:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Outage and recovery check against the simulator.
+
+Polls E3DCCoordinator until the values are there, then lets the
+simulator drop every request (device unreachable) for a few polls and
+finally answers again with a changed value. Checks that the outage polls
+fail within the budget, that nothing ends up in the register quarantine
+and that the first poll after the outage delivers the fresh value.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_outage --outage-polls 2 --budget 15
+    python -m benchmarks.bench_outage --pipeline-depth 4
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.e3dc.const import DEFAULT_PIPELINE_DEPTH
+from custom_components.e3dc.coordinator import E3DCCoordinator
+from custom_components.e3dc.modbus import E3DCModbusClient
+
+from .simulator import E3DCSimulator
+
+CHECK_KEY = "pv_power"
+CHECK_VALUE = 1234
+
+
+async def _poll(coordinator):
+    start = time.perf_counter()
+    await coordinator.async_refresh()
+    return time.perf_counter() - start, coordinator.last_update_success
+
+
+async def run(args):
+    hass = HomeAssistant(tempfile.mkdtemp(prefix="e3dc-bench-"))
+    failed = []
+
+    async with E3DCSimulator(latency=args.latency) as simulator:
+        client = E3DCModbusClient(
+            "127.0.0.1",
+            simulator.port,
+            pipeline_depth=args.pipeline_depth,
+        )
+        coordinator = E3DCCoordinator(hass=hass, client=client)
+
+        elapsed, ok = await _poll(coordinator)
+        print(f"before outage     {elapsed * 1000:8.1f} ms  success={ok}")
+        if not ok:
+            failed.append("initial poll failed")
+
+        # Gerät nicht erreichbar: jede Anfrage bleibt unbeantwortet
+        simulator.drop_rate = 1.0
+        for i in range(args.outage_polls):
+            elapsed, ok = await _poll(coordinator)
+            print(f"outage poll {i + 1}     {elapsed:8.2f} s   success={ok}")
+            if ok:
+                failed.append(f"outage poll {i + 1} reported success")
+            if elapsed > args.budget:
+                failed.append(
+                    f"outage poll {i + 1} took {elapsed:.2f}s "
+                    f"> budget {args.budget}s"
+                )
+
+        simulator.drop_rate = 0.0
+        simulator.set_value(CHECK_KEY, CHECK_VALUE)
+        elapsed, ok = await _poll(coordinator)
+        value = (coordinator.data or {}).get(CHECK_KEY)
+        print(f"after outage      {elapsed * 1000:8.1f} ms  success={ok}")
+        print(f"{CHECK_KEY:<17} {value}")
+        if not ok:
+            failed.append("poll after the outage failed")
+        if value != CHECK_VALUE:
+            failed.append(f"{CHECK_KEY} is {value}, expected {CHECK_VALUE}")
+
+        quarantined = sorted(coordinator.quarantine.as_dict())
+        print(f"quarantine        {quarantined or 'empty'}")
+        if quarantined:
+            failed.append(f"quarantined after outage: {quarantined}")
+
+        await client.close()
+
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--outage-polls", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument(
+        "--pipeline-depth", type=int, default=DEFAULT_PIPELINE_DEPTH
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=15.0,
+        help="max. duration of a poll during the outage (seconds)",
+    )
+    args = parser.parse_args()
+
+    failed = asyncio.run(run(args))
+    for line in failed:
+        print(f"FAILED {line}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""End-to-end poll benchmark against the E3/DC simulator.
+
+Runs the simulator in a separate process (so its CPU time does not count
+against the integration), drives E3DCCoordinator/E3DCModbusClient for a
+number of poll cycles and reports transactions per poll, poll wall time,
+per-transaction p50/p99 latency and CPU time per poll.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_poll --polls 50 --latency 0.005
+    python -m benchmarks.bench_poll --save baseline.json
+    python -m benchmarks.bench_poll --baseline baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.e3dc.coordinator import E3DCCoordinator
+from custom_components.e3dc.modbus import E3DCModbusClient
+
+from .simulator import add_simulator_arguments
+
+# Erlaubte Verschlechterung gegenüber der Baseline
+REGRESSION_TOLERANCE = 0.2
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def free_port(host):
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def start_simulator(args, port):
+    cmd = [
+        sys.executable,
+        "-m",
+        "benchmarks.simulator",
+        "--host",
+        args.host,
+        "--port",
+        str(port),
+        "--offset",
+        str(args.offset),
+        "--latency",
+        str(args.latency),
+        "--jitter",
+        str(args.jitter),
+        "--error-rate",
+        str(args.error_rate),
+        "--drop-rate",
+        str(args.drop_rate),
+    ]
+    if args.unsupported:
+        cmd += ["--unsupported", *map(str, args.unsupported)]
+    if args.dynamic:
+        cmd.append("--dynamic")
+    if args.seed is not None:
+        cmd += ["--seed", str(args.seed)]
+
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if "listening" not in line:
+        proc.kill()
+        raise SystemExit("Simulator did not start")
+    return proc
+
+
+class TransactionCounter:
+    """Wraps the client's low-level calls to time every transaction."""
+
+    def __init__(self, client):
+        self.latencies = []
+        self._read = client.read_holding_registers
+        client.read_holding_registers = self.read_holding_registers
+
+    async def read_holding_registers(self, address, count):
+        start = time.perf_counter()
+        try:
+            return await self._read(address, count)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+
+async def run(args, port):
+    hass = HomeAssistant(tempfile.mkdtemp(prefix="e3dc-bench-"))
+    client = E3DCModbusClient(
+        host=args.host,
+        port=port,
+        register_offset=args.offset,
+        pipeline_depth=args.pipeline_depth,
+    )
+    counter = TransactionCounter(client)
+    coordinator = E3DCCoordinator(
+        hass=hass,
+        client=client,
+        scan_interval=args.scan_interval,
+        max_read_gap=args.max_read_gap,
+        slow_interval=args.slow_interval,
+    )
+
+    for _ in range(args.warmup):
+        await coordinator.async_refresh()
+    counter.latencies.clear()
+
+    poll_times = []
+    transactions = []
+    cpu_start = time.process_time()
+    for _ in range(args.polls):
+        before = len(counter.latencies)
+        start = time.perf_counter()
+        await coordinator.async_refresh()
+        poll_times.append(time.perf_counter() - start)
+        transactions.append(len(counter.latencies) - before)
+        if not coordinator.last_update_success:
+            print("warning: poll failed", file=sys.stderr)
+    cpu = time.process_time() - cpu_start
+
+    await client.close()
+
+    return {
+        "polls": args.polls,
+        "transactions_per_poll": statistics.mean(transactions),
+        "poll_ms_mean": statistics.mean(poll_times) * 1000,
+        "poll_ms_p50": percentile(poll_times, 50) * 1000,
+        "poll_ms_p99": percentile(poll_times, 99) * 1000,
+        "transaction_ms_p50": percentile(counter.latencies, 50) * 1000,
+        "transaction_ms_p99": percentile(counter.latencies, 99) * 1000,
+        "cpu_ms_per_poll": cpu / args.polls * 1000,
+    }
+
+
+def compare(result, baseline):
+    failed = []
+    for key in ("transactions_per_poll", "poll_ms_p50", "cpu_ms_per_poll"):
+        if key not in baseline or not baseline[key]:
+            continue
+        if result[key] > baseline[key] * (1 + REGRESSION_TOLERANCE):
+            failed.append(
+                f"{key}: {result[key]:.2f} > baseline {baseline[key]:.2f}"
+            )
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--polls", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--scan-interval", type=int, default=5)
+    parser.add_argument("--slow-interval", type=float, default=None)
+    parser.add_argument("--max-read-gap", type=int, default=None)
+    parser.add_argument("--pipeline-depth", type=int, default=1)
+    parser.add_argument("--save", help="write results as JSON baseline")
+    parser.add_argument("--baseline", help="fail on regression vs. JSON")
+    add_simulator_arguments(parser)
+    args = parser.parse_args()
+
+    port = free_port(args.host)
+    proc = start_simulator(args, port)
+    try:
+        result = asyncio.run(run(args, port))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    for key, value in result.items():
+        print(f"{key:<24} {value:>10.2f}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(result, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            failed = compare(result, json.load(file))
+        for line in failed:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if failed:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Record register traffic to a capture file and replay it.
+
+``record`` polls the in-process simulator (or a real system with
+``--target``) and writes every raw register block to a capture file.
+``replay`` drives E3DCCoordinator from such a capture with
+E3DCReplayClient, either as fast as possible (decoder/coordinator
+throughput) or in real time.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_replay record day.capture --polls 500
+    python -m benchmarks.bench_replay replay day.capture
+    python -m benchmarks.bench_replay replay day.capture --realtime --speed 60
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.e3dc.capture import CaptureRecorder, E3DCReplayClient
+from custom_components.e3dc.coordinator import E3DCCoordinator
+from custom_components.e3dc.modbus import E3DCModbusClient
+
+from .simulator import E3DCSimulator
+
+
+async def record(args):
+    hass = HomeAssistant(tempfile.mkdtemp(prefix="e3dc-record-"))
+
+    simulator = None
+    if args.target:
+        host, _, port = args.target.partition(":")
+        port = int(port or 502)
+    else:
+        simulator = await E3DCSimulator(dynamic=True).start()
+        host, port = "127.0.0.1", simulator.port
+
+    client = E3DCModbusClient(host, port, register_offset=args.offset)
+    client.recorder = CaptureRecorder(
+        hass, args.capture, args.max_size * 1024 * 1024
+    )
+    coordinator = E3DCCoordinator(hass=hass, client=client)
+
+    for _ in range(args.polls):
+        await coordinator.async_refresh()
+        if args.interval:
+            await asyncio.sleep(args.interval)
+
+    await client.recorder.async_flush()
+    await client.close()
+    if simulator is not None:
+        await simulator.stop()
+
+    print(f"records written   {client.stats.totals['transactions']}")
+    print(f"capture size      {os.path.getsize(args.capture)} bytes")
+
+
+async def replay(args):
+    hass = HomeAssistant(tempfile.mkdtemp(prefix="e3dc-replay-"))
+    client = E3DCReplayClient(
+        args.capture,
+        realtime=args.realtime,
+        speed=args.speed,
+    )
+    await client.connect()
+    coordinator = E3DCCoordinator(hass=hass, client=client)
+
+    polls = 0
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    while True:
+        await coordinator.async_refresh()
+        if not coordinator.last_update_success or not any(
+            coordinator.data.get(key) is not None
+            for key in ("pv_power", "house_power")
+        ):
+            break
+        polls += 1
+        if args.realtime:
+            if time.perf_counter() - start >= client.duration / args.speed:
+                break
+            await asyncio.sleep(args.interval or 1)
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+
+    await client.close()
+
+    print(f"records           {client.records}")
+    print(f"capture span      {client.duration:.1f} s")
+    print(f"polls replayed    {polls}")
+    if polls:
+        print(f"polls per second  {polls / elapsed:10.1f}")
+        print(f"cpu per poll      {cpu / polls * 1000:10.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("mode", choices=("record", "replay"))
+    parser.add_argument("capture")
+    parser.add_argument("--polls", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.0)
+    parser.add_argument("--target", help="host[:port] of a real system")
+    parser.add_argument("--offset", type=int, default=0)
+    parser.add_argument("--max-size", type=int, default=50, help="MB")
+    parser.add_argument("--realtime", action="store_true")
+    parser.add_argument("--speed", type=float, default=1.0)
+    args = parser.parse_args()
+
+    asyncio.run(record(args) if args.mode == "record" else replay(args))
+
+
+if __name__ == "__main__":
+    main()
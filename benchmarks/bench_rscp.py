@@ -0,0 +1,141 @@
+"""RSCP end-to-end check against the local stand-in server.
+
+Starts E3DCRscpServer, polls E3DCCoordinator with E3DCRscpClient and
+compares the values with the server's answers, then reads one hour of
+device history via async_read_history. Reports the poll time and the
+RSCP frames per poll; fails on wrong values or if a poll exceeds the
+budget.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_rscp --polls 20 --key secret
+    python -m benchmarks.bench_rscp --key "" --latency 0.02
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.e3dc import rscp
+from custom_components.e3dc.coordinator import E3DCCoordinator
+
+from .rscp_server import PASSWORD, USERNAME, E3DCRscpServer
+from .simulator import DEFAULT_VALUES
+
+# Über RSCP gelieferte Werte, die unverändert ankommen müssen
+CHECK_KEYS = (
+    "pv_power",
+    "battery_power",
+    "grid_power",
+    "battery_soc",
+    "serial_number",
+    "firmware_release",
+)
+HISTORY_SPAN = 3600
+
+
+async def run(args):
+    hass = HomeAssistant(tempfile.mkdtemp(prefix="e3dc-bench-"))
+    failed = []
+
+    # Frames beginnen auf der Leitung mit E3 DC 00 11
+    frame_start = rscp.encode_frame([])[:4]
+    if frame_start != b"\xe3\xdc\x00\x11":
+        failed.append(f"frame starts with {frame_start.hex(' ')}")
+
+    key = args.key or None
+    async with E3DCRscpServer(key=key, latency=args.latency) as server:
+        client = rscp.E3DCRscpClient(
+            "127.0.0.1",
+            server.port,
+            USERNAME,
+            PASSWORD,
+            key,
+            # Jeder Poll holt ein neues Abbild
+            max_age=0,
+        )
+        coordinator = E3DCCoordinator(hass=hass, client=client)
+
+        poll_times = []
+        frames = server.stats.frames
+        for _ in range(args.polls):
+            start = time.perf_counter()
+            await coordinator.async_refresh()
+            poll_times.append(time.perf_counter() - start)
+            if not coordinator.last_update_success:
+                failed.append("poll failed")
+                break
+        frames = (server.stats.frames - frames) / max(len(poll_times), 1)
+
+        data = coordinator.data or {}
+        for key_name in CHECK_KEYS:
+            if data.get(key_name) != DEFAULT_VALUES[key_name]:
+                failed.append(
+                    f"{key_name} is {data.get(key_name)!r}, "
+                    f"expected {DEFAULT_VALUES[key_name]!r}"
+                )
+
+        history = await client.async_read_history(
+            int(time.time()) - HISTORY_SPAN, HISTORY_SPAN
+        )
+        expected = DEFAULT_VALUES["pv_power"] / 1000
+        solar = history.get("solar_production")
+        if solar is None or abs(solar - expected) > 0.001:
+            failed.append(
+                f"history solar_production is {solar}, expected {expected}"
+            )
+
+        await client.close()
+
+    result = {
+        "polls": len(poll_times),
+        "poll_ms_p50": statistics.median(poll_times) * 1000,
+        "poll_ms_max": max(poll_times) * 1000,
+        "frames_per_poll": frames,
+        "history": history,
+    }
+    if result["poll_ms_max"] > args.budget:
+        failed.append(
+            f"poll took {result['poll_ms_max']:.1f} ms "
+            f"> budget {args.budget} ms"
+        )
+    return result, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--polls", type=int, default=10)
+    parser.add_argument(
+        "--key",
+        default="secret",
+        help="RSCP key (empty: unencrypted stand-in mode)",
+    )
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=500.0,
+        help="max. duration of one poll (ms)",
+    )
+    args = parser.parse_args()
+
+    result, failed = asyncio.run(run(args))
+    print(f"polls             {result['polls']}")
+    print(f"poll p50          {result['poll_ms_p50']:8.2f} ms")
+    print(f"poll max          {result['poll_ms_max']:8.2f} ms")
+    print(f"frames per poll   {result['frames_per_poll']:.1f}")
+    for key, value in sorted(result["history"].items()):
+        print(f"history {key:<21} {value:.3f} kWh")
+
+    for line in failed:
+        print(f"FAILED {line}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
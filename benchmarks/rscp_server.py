@@ -0,0 +1,261 @@
+"""Local RSCP stand-in server for tests and benchmarks.
+
+Speaks the RSCP framing and encryption from rscp.py, answers the
+authentication, EMS power/status and INFO requests with the simulator's
+default values and the DB history request with sums derived from the
+current power values. Unknown tags are answered with an error item.
+
+Usage (from the repository root):
+
+    python -m benchmarks.rscp_server --port 5033 --key secret
+"""
+
+import argparse
+import asyncio
+
+from custom_components.e3dc import rscp
+
+from .simulator import DEFAULT_VALUES
+
+USERNAME = "user@example.com"
+PASSWORD = "password"
+
+# Antwortwerte je Tag (Typ, Wert), aus den Simulator-Standardwerten
+RESPONSES = {
+    rscp.TAG_EMS_POWER_PV: (rscp.TYPE_INT32, DEFAULT_VALUES["pv_power"]),
+    rscp.TAG_EMS_POWER_BAT: (
+        rscp.TYPE_INT32,
+        DEFAULT_VALUES["battery_power"],
+    ),
+    rscp.TAG_EMS_POWER_HOME: (
+        rscp.TYPE_INT32,
+        DEFAULT_VALUES["house_power"],
+    ),
+    rscp.TAG_EMS_POWER_GRID: (
+        rscp.TYPE_INT32,
+        DEFAULT_VALUES["grid_power"],
+    ),
+    rscp.TAG_EMS_POWER_ADD: (
+        rscp.TYPE_INT32,
+        -DEFAULT_VALUES["additional_feedin_power"],
+    ),
+    rscp.TAG_EMS_POWER_WB_ALL: (
+        rscp.TYPE_DOUBLE64,
+        float(DEFAULT_VALUES["wallbox_power"]),
+    ),
+    rscp.TAG_EMS_POWER_WB_SOLAR: (
+        rscp.TYPE_DOUBLE64,
+        float(DEFAULT_VALUES["wallbox_solar_power"]),
+    ),
+    rscp.TAG_EMS_AUTARKY: (
+        rscp.TYPE_FLOAT32,
+        float(DEFAULT_VALUES["autarky_raw"] >> 8),
+    ),
+    rscp.TAG_EMS_SELF_CONSUMPTION: (
+        rscp.TYPE_FLOAT32,
+        float(DEFAULT_VALUES["autarky_raw"] & 0xFF),
+    ),
+    rscp.TAG_EMS_BAT_SOC: (rscp.TYPE_UCHAR8, DEFAULT_VALUES["battery_soc"]),
+    rscp.TAG_EMS_STATUS: (rscp.TYPE_UINT32, DEFAULT_VALUES["ems_status"]),
+    rscp.TAG_INFO_SERIAL_NUMBER: (
+        rscp.TYPE_CSTRING,
+        DEFAULT_VALUES["serial_number"],
+    ),
+    rscp.TAG_INFO_SW_RELEASE: (
+        rscp.TYPE_CSTRING,
+        DEFAULT_VALUES["firmware_release"],
+    ),
+}
+
+# RSCP-Fehlercode "Tag unbekannt"
+ERR_NOT_HANDLED = 6
+
+
+class RscpServerStats:
+    def __init__(self):
+        self.frames = 0
+        self.items = 0
+        self.history_requests = 0
+        self.connections = 0
+
+
+class E3DCRscpServer:
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        key="secret",
+        username=USERNAME,
+        password=PASSWORD,
+        latency=0.0,
+    ):
+        self.host = host
+        self.port = port
+        self.key = key
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.responses = dict(RESPONSES)
+        self.stats = RscpServerStats()
+
+        self._server = None
+        self._writers = set()
+        self._handlers = set()
+
+    async def start(self):
+        self._server = await asyncio.start_server(
+            self._handle_connection,
+            self.host,
+            self.port,
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is None:
+            return
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def _handle_connection(self, reader, writer):
+        self.stats.connections += 1
+        self._writers.add(writer)
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+
+        cipher = rscp.RscpCipher(self.key)
+        authenticated = False
+        try:
+            while True:
+                items = await rscp.async_read_frame(reader, cipher)
+                self.stats.frames += 1
+                self.stats.items += len(items)
+
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+
+                response = []
+                for tag, _, value in items:
+                    if tag == rscp.TAG_REQ_AUTHENTICATION:
+                        authenticated = self._check_login(value)
+                        response.append(
+                            (
+                                rscp.TAG_AUTHENTICATION,
+                                rscp.TYPE_UCHAR8,
+                                10 if authenticated else 0,
+                            )
+                        )
+                    elif not authenticated:
+                        response.append(self._error(tag))
+                    elif tag == rscp.TAG_DB_REQ_HISTORY_DATA_DAY:
+                        response.append(self._history(value))
+                    else:
+                        response.append(self._value(tag))
+
+                writer.write(cipher.encrypt(rscp.encode_frame(response)))
+                await writer.drain()
+        except (
+            asyncio.IncompleteReadError,
+            ConnectionError,
+            rscp.RscpError,
+        ):
+            pass
+        finally:
+            self._writers.discard(writer)
+            self._handlers.discard(handler)
+            writer.close()
+
+    def _check_login(self, items):
+        return (
+            rscp.find_item(items, rscp.TAG_AUTHENTICATION_USER)
+            == self.username
+            and rscp.find_item(items, rscp.TAG_AUTHENTICATION_PASSWORD)
+            == self.password
+        )
+
+    def _error(self, tag):
+        return (
+            tag | 0x00800000,
+            rscp.TYPE_ERROR,
+            ERR_NOT_HANDLED,
+        )
+
+    def _value(self, tag):
+        response_tag = tag | 0x00800000
+        if response_tag not in self.responses:
+            return self._error(tag)
+        rtype, value = self.responses[response_tag]
+        return (response_tag, rtype, value)
+
+    def _history(self, request):
+        self.stats.history_requests += 1
+        span = rscp.find_item(request, rscp.TAG_DB_REQ_HISTORY_TIME_SPAN)
+        hours = (span or 0) / 3600
+
+        def energy(tag, sign=1):
+            power = sign * self.responses[tag][1]
+            return (rscp.TYPE_FLOAT32, max(power, 0) * hours)
+
+        sums = {
+            rscp.TAG_DB_DC_POWER: energy(rscp.TAG_EMS_POWER_PV),
+            rscp.TAG_DB_BAT_POWER_IN: energy(rscp.TAG_EMS_POWER_BAT),
+            rscp.TAG_DB_BAT_POWER_OUT: energy(rscp.TAG_EMS_POWER_BAT, -1),
+            rscp.TAG_DB_GRID_POWER_IN: energy(rscp.TAG_EMS_POWER_GRID, -1),
+            rscp.TAG_DB_GRID_POWER_OUT: energy(rscp.TAG_EMS_POWER_GRID),
+        }
+        return (
+            rscp.TAG_DB_HISTORY_DATA_DAY,
+            rscp.TYPE_CONTAINER,
+            [
+                (
+                    rscp.TAG_DB_SUM_CONTAINER,
+                    rscp.TYPE_CONTAINER,
+                    [
+                        (tag, rtype, value)
+                        for tag, (rtype, value) in sums.items()
+                    ],
+                )
+            ],
+        )
+
+
+async def _serve(args):
+    server = E3DCRscpServer(
+        host=args.host,
+        port=args.port,
+        key=args.key,
+        latency=args.latency,
+    )
+    await server.start()
+    print(f"E3/DC RSCP stand-in listening on {server.host}:{server.port}")
+    print(f"login {server.username} / {server.password}, key {server.key}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5033)
+    parser.add_argument("--key", default="secret")
+    parser.add_argument("--latency", type=float, default=0.0)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
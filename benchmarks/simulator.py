@@ -0,0 +1,350 @@
+"""Simulated E3/DC Simple Mode Modbus/TCP server.
+
+Serves the register layout of the extended register map (maps/, magic
+0xE3DC at 40001) with a configurable register offset and injectable
+latency, jitter and errors.
+Requests are answered concurrently, so pipelined clients see responses
+out of order just like on a real link with varying latency.
+
+Usage (from the repository root):
+
+    python -m benchmarks.simulator --port 5020 --latency 0.01
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import struct
+import time
+
+from custom_components.e3dc.const import WALLBOX_BASE_ADDR
+from custom_components.e3dc.registers import load_register_map
+
+MAGIC = 0xE3DC
+BASE_ADDR = 40001
+REGISTER_COUNT = 200
+
+DEFAULT_VALUES = {
+    "modbus_version": 2,
+    "register_count": 69,
+    "manufacturer": "HagerEnergy GmbH",
+    "model": "S10 E AIO",
+    "serial_number": "S10-123456789012",
+    "firmware_release": "S10_2024_05",
+    "pv_power": 4200,
+    "battery_power": 1500,
+    "house_power": 850,
+    "grid_power": -1850,
+    "additional_feedin_power": 0,
+    "wallbox_power": 0,
+    "wallbox_solar_power": 0,
+    "autarky_raw": (95 << 8) | 60,
+    "battery_soc": 72,
+    "emergency_power": 1,
+    "ems_status": 0b0000100,
+    "ems_remote_control": 0,
+    "ems_ctrl": 0,
+    "dc_string_1_voltage": 612,
+    "dc_string_2_voltage": 598,
+    "dc_string_3_voltage": 0,
+    "dc_string_1_current": 412,
+    "dc_string_2_current": 290,
+    "dc_string_3_current": 0,
+    "dc_string_1_power": 2520,
+    "dc_string_2_power": 1680,
+    "dc_string_3_power": 0,
+    "grid_l1": -600,
+    "grid_l2": -650,
+    "grid_l3": -600,
+    "sg_ready_status": 2,
+}
+
+# Leistungswerte, die im dynamischen Modus schwanken
+DYNAMIC_KEYS = (
+    "pv_power",
+    "battery_power",
+    "house_power",
+    "grid_power",
+    "grid_l1",
+    "grid_l2",
+    "grid_l3",
+)
+
+# Obermenge aller Profile, damit jedes Profil gegen den Simulator läuft
+REGISTER_MAP = load_register_map("extended")
+
+# Modbus exception codes
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_ADDRESS = 0x02
+DEVICE_FAILURE = 0x04
+
+_MBAP = struct.Struct(">HHHB")
+
+
+def encode_value(reg, value):
+    scale = reg.get("scale")
+    if scale:
+        value = round(value / scale)
+
+    rtype = reg["type"]
+    if rtype == "int32":
+        value &= 0xFFFFFFFF
+        return [value & 0xFFFF, value >> 16]
+    if rtype in ("uint16", "int16"):
+        return [value & 0xFFFF]
+    if rtype == "string":
+        raw = value.encode("ascii")[: reg["len"] * 2]
+        raw = raw.ljust(reg["len"] * 2, b"\x00")
+        return list(struct.unpack(f">{reg['len']}H", raw))
+    raise ValueError(f"Unsupported register type: {rtype}")
+
+
+class SimulatorStats:
+    def __init__(self):
+        self.transactions = 0
+        self.reads = 0
+        self.writes = 0
+        self.registers_read = 0
+        self.errors = 0
+        self.dropped = 0
+        self.connections = 0
+
+
+class E3DCSimulator:
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        register_offset=0,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        drop_rate=0.0,
+        unsupported=(),
+        dynamic=False,
+        seed=None,
+    ):
+        self.host = host
+        self.port = port
+        self.register_offset = register_offset
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.unsupported = set(unsupported)
+        self.dynamic = dynamic
+        self.stats = SimulatorStats()
+
+        self._rng = random.Random(seed)
+        self._server = None
+        self._writers = set()
+        self._handlers = set()
+        self._started = time.monotonic()
+
+        self.registers = [0] * REGISTER_COUNT
+        self.registers[0] = MAGIC
+        self._regdefs = REGISTER_MAP.fields
+        for key, value in DEFAULT_VALUES.items():
+            self.set_value(key, value)
+        # Wallbox 0: verfügbar, Solarmodus
+        self.set_wallbox_ctrl(0, 0b11)
+
+    # --------------------------------------------------
+    # Register image
+    # --------------------------------------------------
+
+    def set_value(self, key, value):
+        reg = self._regdefs[key]
+        self.set_registers(reg["addr"], encode_value(reg, value))
+
+    def set_registers(self, addr, values):
+        index = addr - BASE_ADDR
+        self.registers[index:index + len(values)] = values
+
+    def set_wallbox_ctrl(self, wallbox, value):
+        self.set_registers(WALLBOX_BASE_ADDR + wallbox, [value & 0xFFFF])
+
+    def _update_dynamic(self):
+        t = time.monotonic() - self._started
+        for i, key in enumerate(DYNAMIC_KEYS):
+            base = DEFAULT_VALUES[key]
+            wobble = math.sin(t / 7.0 + i) * 0.2 + self._rng.uniform(
+                -0.02, 0.02
+            )
+            self.set_value(key, int(base * (1 + wobble)))
+
+    # --------------------------------------------------
+    # Server
+    # --------------------------------------------------
+
+    async def start(self):
+        self._server = await asyncio.start_server(
+            self._handle_connection,
+            self.host,
+            self.port,
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is None:
+            return
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def _handle_connection(self, reader, writer):
+        self.stats.connections += 1
+        self._writers.add(writer)
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        tasks = set()
+        try:
+            while True:
+                header = await reader.readexactly(_MBAP.size)
+                tid, pid, length, unit = _MBAP.unpack(header)
+                pdu = await reader.readexactly(length - 1)
+                task = asyncio.create_task(
+                    self._respond(writer, tid, pid, unit, pdu)
+                )
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._writers.discard(writer)
+            self._handlers.discard(handler)
+            writer.close()
+
+    async def _respond(self, writer, tid, pid, unit, pdu):
+        self.stats.transactions += 1
+
+        delay = self.latency + self._rng.uniform(0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self.drop_rate and self._rng.random() < self.drop_rate:
+            self.stats.dropped += 1
+            return
+
+        response = self._process(pdu)
+        if writer.is_closing():
+            return
+        writer.write(
+            _MBAP.pack(tid, pid, len(response) + 1, unit) + response
+        )
+
+    def _process(self, pdu):
+        function = pdu[0]
+
+        if self.error_rate and self._rng.random() < self.error_rate:
+            return self._exception(function, DEVICE_FAILURE)
+
+        if function == 0x03:
+            address, count = struct.unpack(">HH", pdu[1:5])
+            start = self._to_index(address)
+            if (
+                start < 0
+                or count < 1
+                or count > 125
+                or start + count > REGISTER_COUNT
+                or any(
+                    BASE_ADDR + i in self.unsupported
+                    for i in range(start, start + count)
+                )
+            ):
+                return self._exception(function, ILLEGAL_ADDRESS)
+
+            if self.dynamic:
+                self._update_dynamic()
+
+            self.stats.reads += 1
+            self.stats.registers_read += count
+            values = self.registers[start:start + count]
+            return struct.pack(
+                f">BB{count}H", function, count * 2, *values
+            )
+
+        if function == 0x06:
+            address, value = struct.unpack(">HH", pdu[1:5])
+            index = self._to_index(address)
+            if not 0 <= index < REGISTER_COUNT:
+                return self._exception(function, ILLEGAL_ADDRESS)
+            self.stats.writes += 1
+            self.registers[index] = value
+            return pdu[:5]
+
+        return self._exception(function, ILLEGAL_FUNCTION)
+
+    def _to_index(self, address):
+        # Der Client rechnet (addr - 40001) + offset; hier zurückrechnen
+        return address - self.register_offset
+
+    def _exception(self, function, code):
+        self.stats.errors += 1
+        return bytes((function | 0x80, code))
+
+
+async def _serve(args):
+    simulator = E3DCSimulator(
+        host=args.host,
+        port=args.port,
+        register_offset=args.offset,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        drop_rate=args.drop_rate,
+        unsupported=args.unsupported,
+        dynamic=args.dynamic,
+        seed=args.seed,
+    )
+    await simulator.start()
+    print(f"E3/DC simulator listening on {simulator.host}:{simulator.port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await simulator.stop()
+
+
+def add_simulator_arguments(parser):
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--offset", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--unsupported",
+        type=int,
+        nargs="*",
+        default=[],
+        help="1-based register addresses answered with ILLEGAL ADDRESS",
+    )
+    parser.add_argument("--dynamic", action="store_true")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=5020)
+    add_simulator_arguments(parser)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,24 @@
-from .const import DOMAIN, DEFAULT_PORT, DEFAULT_UNIT_ID, DEFAULT_REGISTER_OFFSET
-from .modbus import E3DCModbusClient
+from homeassistant.exceptions import ConfigEntryError
+
+from .const import (
+    DOMAIN,
+    DEFAULT_PORT,
+    DEFAULT_UNIT_ID,
+    DEFAULT_REGISTER_OFFSET,
+    DEFAULT_PIPELINE_DEPTH,
+    DEFAULT_CAPTURE_MAX_SIZE,
+    DEFAULT_SAMPLE_INTERVAL,
+    DEFAULT_RSCP_PORT,
+    DEFAULT_REGISTER_MAP,
+    TRANSPORT_RSCP,
+)
+from .capture import CaptureRecorder
+from .modbus import E3DCModbusClient, import_pymodbus
 from .coordinator import E3DCCoordinator
+from .registers import RegisterMapError, async_get_register_map
+from .sampler import HighRateSampler
+from .scheduler import async_get_scheduler
+from .wallbox import WallboxCommander
 
 PLATFORMS = ["sensor", "binary_sensor", "switch"]
 
@@ -14,25 +32,103 @@ async def async_setup_entry(hass, entry):
         entry.data.get("register_offset", DEFAULT_REGISTER_OFFSET),
     )
 
-    client = E3DCModbusClient(
-        host=host,
-        port=port,
-        unit_id=unit_id,
-        register_offset=register_offset,
-    )
+    try:
+        register_map = await async_get_register_map(
+            hass,
+            entry.options.get("register_map", DEFAULT_REGISTER_MAP),
+        )
+    except RegisterMapError as err:
+        raise ConfigEntryError(str(err)) from err
+
+    if entry.data.get("transport") == TRANSPORT_RSCP:
+        from .rscp import E3DCRscpClient, import_rijndael
+
+        # py3rijndael wird erst beim Verbinden gebraucht, der Import soll
+        # aber nicht im Event Loop laufen
+        await hass.async_add_executor_job(import_rijndael)
+
+        client = E3DCRscpClient(
+            host=host,
+            port=entry.data.get("port", DEFAULT_RSCP_PORT),
+            username=entry.data["username"],
+            password=entry.data["password"],
+            rscp_key=entry.data["rscp_key"],
+            register_map=register_map,
+        )
+    else:
+        pipeline_depth = entry.options.get(
+            "pipeline_depth", DEFAULT_PIPELINE_DEPTH
+        )
+        if pipeline_depth <= 1:
+            # pymodbus braucht E3DCConnection; der Import dauert und darf
+            # den Event Loop nicht blockieren
+            await hass.async_add_executor_job(import_pymodbus)
+
+        client = E3DCModbusClient(
+            host=host,
+            port=port,
+            unit_id=unit_id,
+            register_offset=register_offset,
+            pipeline_depth=pipeline_depth,
+        )
+
+    if entry.options.get("capture", False):
+        client.recorder = CaptureRecorder(
+            hass,
+            hass.config.path(f"{DOMAIN}_{entry.entry_id}.capture"),
+            entry.options.get("capture_max_size", DEFAULT_CAPTURE_MAX_SIZE)
+            * 1024
+            * 1024,
+        )
 
     coordinator = E3DCCoordinator(
         hass=hass,
         client=client,
         scan_interval=entry.options.get("scan_interval"),
+        max_read_gap=entry.options.get("max_read_gap"),
+        slow_interval=entry.options.get("slow_scan_interval"),
+        wallboxes=entry.options.get(
+            "wallboxes",
+            entry.data.get("wallboxes", 1),
+        ),
+        entry_id=entry.entry_id,
+        adaptive=entry.options.get("adaptive_scan", False),
+        scan_interval_min=entry.options.get("scan_interval_min"),
+        scan_interval_max=entry.options.get("scan_interval_max"),
+        register_map=register_map,
     )
 
-    await coordinator.async_config_entry_first_refresh()
+    # Nicht über RSCP: das zwischengespeicherte Abbild (1 s) würde
+    # mehrfach als Abtastwert gezählt
+    if (
+        entry.options.get("high_rate_sampling", False)
+        and client.supports_sampling
+    ):
+        coordinator.sampler = HighRateSampler(
+            hass,
+            client,
+            entry.options.get("sample_interval", DEFAULT_SAMPLE_INTERVAL),
+            register_map=register_map,
+        )
+
+    if entry.options.get("import_statistics", False):
+        # Recorder erst laden, wenn der Import aktiviert ist
+        from .statistics import EnergyStatistics
+
+        coordinator.statistics = EnergyStatistics(hass, entry.entry_id)
+
+    await coordinator.energy.async_load()
+    await coordinator.async_backfill_energy()
+    await coordinator.async_first_refresh_staged()
+    async_get_scheduler(hass).async_register(entry.entry_id, coordinator)
+    if coordinator.sampler is not None:
+        coordinator.sampler.async_start()
 
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = {
         "client": client,
         "coordinator": coordinator,
+        "wallbox": WallboxCommander(hass, coordinator, client),
     }
 
     await hass.config_entries.async_forward_entry_setups(
@@ -50,8 +146,29 @@ async def async_unload_entry(hass, entry):
     )
 
     if unload_ok:
-        client = hass.data.get(DOMAIN, {}).get(entry.entry_id, {}).get("client")
+        async_get_scheduler(hass).async_unregister(entry.entry_id)
+
+        data = hass.data.get(DOMAIN, {}).get(entry.entry_id, {})
+
+        coordinator = data.get("coordinator")
+        if coordinator:
+            if coordinator.sampler is not None:
+                await coordinator.sampler.async_stop()
+            await coordinator.async_shutdown()
+            await coordinator.energy.async_save()
+            if coordinator.statistics is not None:
+                coordinator.statistics.async_flush()
+
+        # Ausstehende Wallbox-Schreib- und Prüfvorgänge vor dem Schließen
+        # des Clients beenden, sonst verbinden sie sich neu
+        commander = data.get("wallbox")
+        if commander:
+            await commander.async_shutdown()
+
+        client = data.get("client")
         if client:
+            if client.recorder is not None:
+                await client.recorder.async_flush()
             await client.close()
 
         hass.data.get(DOMAIN, {}).pop(entry.entry_id, None)
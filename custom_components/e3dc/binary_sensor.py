@@ -1,8 +1,7 @@
 from homeassistant.components.binary_sensor import BinarySensorEntity
-from homeassistant.helpers.entity import DeviceInfo
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN, EMS_BITS
+from .const import DOMAIN
+from .entity import E3DCEntity
 
 
 EMS_BINARY_SENSORS = {
@@ -33,12 +32,12 @@ async def async_setup_entry(hass, entry, async_add_entities):
     async_add_entities(entities)
 
 
-class E3DCEMSBinarySensor(CoordinatorEntity, BinarySensorEntity):
+class E3DCEMSBinarySensor(E3DCEntity, BinarySensorEntity):
     def __init__(self, coordinator, entry, key, name):
-        super().__init__(coordinator)
+        super().__init__(coordinator, entry)
 
-        self._entry = entry
         self._key = key
+        self._data_keys = ("ems",)
 
         self._attr_name = f"E3DC {name}"
         self._attr_unique_id = f"{entry.entry_id}_ems_{key}"
@@ -48,14 +47,5 @@ class E3DCEMSBinarySensor(CoordinatorEntity, BinarySensorEntity):
     def is_on(self):
         return self.coordinator.data.get("ems", {}).get(self._key)
 
-    @property
-    def device_info(self):
-        data = self.coordinator.data
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._entry.entry_id)},
-            manufacturer=data.get("manufacturer") or "HagerEnergy / E3/DC",
-            model=data.get("model"),
-            serial_number=data.get("serial_number"),
-            sw_version=data.get("firmware_release"),
-            name="E3/DC Energiespeichersystem",
-        )
+    def _state_value(self):
+        return self.is_on
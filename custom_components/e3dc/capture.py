@@ -0,0 +1,253 @@
+import asyncio
+import bisect
+import logging
+import mmap
+import os
+import struct
+import time
+
+from .const import CAPTURE_MAGIC, CAPTURE_FLUSH_DELAY
+from .modbus import STATE_CONNECTED, STATE_DISCONNECTED, E3DCModbusClient
+from .stats import TransportStats
+
+_LOGGER = logging.getLogger(__name__)
+
+# Datensatz: Zeitstempel (s), Startadresse (40001-basiert, ohne Offset),
+# Anzahl Register; danach die Register selbst (uint16, little endian)
+_RECORD = struct.Struct("<dHH")
+_REGISTER_STRUCTS = {}
+
+
+def _registers_struct(count):
+    fmt = _REGISTER_STRUCTS.get(count)
+    if fmt is None:
+        fmt = _REGISTER_STRUCTS[count] = struct.Struct(f"<{count}H")
+    return fmt
+
+
+class CaptureRecorder:
+    """Appends raw register blocks to a compact binary capture file.
+
+    Records are buffered in memory and written from the executor. When
+    the file would exceed ``max_size`` bytes it is rotated to ``.1``
+    (one previous file is kept), so the capture stays append-only.
+    """
+
+    def __init__(self, hass, path, max_size, flush_delay=CAPTURE_FLUSH_DELAY):
+        self._hass = hass
+        self._path = path
+        self._max_size = max_size
+        self._flush_delay = flush_delay
+
+        self._buffer = bytearray()
+        self._flush_handle = None
+
+    def record(self, address, registers, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+
+        count = len(registers)
+        self._buffer += _RECORD.pack(timestamp, address, count)
+        self._buffer += _registers_struct(count).pack(*registers)
+
+        if self._flush_handle is None:
+            self._flush_handle = self._hass.loop.call_later(
+                self._flush_delay,
+                lambda: self._hass.async_create_background_task(
+                    self.async_flush(), "e3dc capture flush"
+                ),
+            )
+
+    async def async_flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        if not self._buffer:
+            return
+
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        try:
+            await self._hass.async_add_executor_job(self._write, data)
+        except OSError as err:
+            _LOGGER.warning("Writing capture %s failed: %s", self._path, err)
+
+    def _write(self, data):
+        try:
+            size = os.path.getsize(self._path)
+        except FileNotFoundError:
+            size = 0
+
+        if size and size + len(data) > self._max_size:
+            os.replace(self._path, f"{self._path}.1")
+            size = 0
+
+        with open(self._path, "ab") as file:
+            if not size:
+                file.write(CAPTURE_MAGIC)
+            file.write(data)
+
+
+class E3DCReplayClient(E3DCModbusClient):
+    """Serves register reads from a capture file instead of a device.
+
+    Same interface as E3DCModbusClient. The capture is memory-mapped and
+    indexed once on connect. With ``realtime`` the capture is replayed
+    at ``speed`` times its original pace; otherwise every read of a
+    block advances to the next recorded value of that block, so each
+    coordinator poll replays the next recorded poll as fast as possible.
+    """
+
+    def __init__(self, path, realtime=False, speed=1.0, loop=False):
+        self._path = path
+        self._realtime = realtime
+        self._speed = speed
+        self._loop = loop
+
+        self.stats = TransportStats()
+        self._state = STATE_DISCONNECTED
+        self._connection_id = 0
+
+        self._file = None
+        self._map = None
+        self._index = []
+        self._times = []
+        self._reset()
+
+    def _reset(self):
+        self._image = {}
+        self._cursor = 0
+        self._started = None
+
+    @property
+    def connection_id(self):
+        return self._connection_id
+
+    @property
+    def connection_state(self):
+        return self._state
+
+    @property
+    def reconnect_count(self):
+        return 0
+
+    @property
+    def records(self):
+        return len(self._index)
+
+    @property
+    def duration(self):
+        if not self._times:
+            return 0.0
+        return self._times[-1] - self._times[0]
+
+    async def connect(self):
+        if self._map is None:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._open
+            )
+            self._connection_id += 1
+        self._state = STATE_CONNECTED
+
+    async def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = None
+            self._file = None
+        self._state = STATE_DISCONNECTED
+
+    def _open(self):
+        self._file = open(self._path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._map[: len(CAPTURE_MAGIC)] != CAPTURE_MAGIC:
+            raise ValueError(f"{self._path} is not an E3/DC capture")
+
+        # Index: (Zeitstempel, Adresse, Anzahl, Position der Register)
+        index = []
+        position = len(CAPTURE_MAGIC)
+        end = len(self._map)
+        while position + _RECORD.size <= end:
+            timestamp, address, count = _RECORD.unpack_from(
+                self._map, position
+            )
+            position += _RECORD.size
+            if position + count * 2 > end:
+                # Abgeschnittener letzter Datensatz
+                break
+            index.append((timestamp, address, count, position))
+            position += count * 2
+
+        self._index = index
+        self._times = [record[0] for record in index]
+        self._reset()
+
+    def _apply(self, record):
+        _, address, count, position = record
+        registers = _registers_struct(count).unpack_from(self._map, position)
+        for offset, value in enumerate(registers):
+            self._image[address + offset] = value
+
+    def _advance_to_time(self):
+        now = time.monotonic()
+        if self._started is None:
+            self._started = now
+
+        replay_time = self._times[0] + (now - self._started) * self._speed
+        target = bisect.bisect_right(self._times, replay_time)
+        if target >= len(self._index) and self._loop:
+            self._reset()
+            return self._advance_to_time()
+
+        for record in self._index[self._cursor:target]:
+            self._apply(record)
+        self._cursor = max(self._cursor, target)
+
+    def _advance_to_block(self, address, count):
+        # Nächsten Datensatz suchen, der den angefragten Bereich berührt
+        for position in range(self._cursor, len(self._index)):
+            record = self._index[position]
+            if record[1] < address + count and address < record[1] + record[2]:
+                for previous in self._index[self._cursor:position + 1]:
+                    self._apply(previous)
+                self._cursor = position + 1
+                return True
+        return False
+
+    async def read_holding_registers(self, address: int, count: int):
+        if self._map is None:
+            await self.connect()
+
+        start = time.monotonic()
+        if self._realtime:
+            self._advance_to_time()
+        elif not self._advance_to_block(address, count):
+            if not self._loop or not self._index:
+                err = ConnectionError("End of capture reached")
+                self.stats.record_error(err)
+                raise err
+            self._reset()
+            self._advance_to_block(address, count)
+
+        try:
+            registers = [
+                self._image[address + offset] for offset in range(count)
+            ]
+        except KeyError as err:
+            error = ValueError(f"Register {err} not in capture")
+            self.stats.record_error(error)
+            raise error from None
+
+        self.stats.record_transaction(
+            f"{address}+{count}",
+            time.monotonic() - start,
+            count,
+        )
+        return registers
+
+    async def write_register(self, address: int, value: int):
+        # Schreibzugriffe nur im Abbild, die Aufnahme bleibt unverändert
+        self._image[address] = value
+        self.stats.record_transaction(f"write {address}", 0.0)
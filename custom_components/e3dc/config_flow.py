@@ -1,3 +1,5 @@
+import asyncio
+import ipaddress
 import logging
 
 import voluptuous as vol
@@ -11,12 +13,37 @@ from .const import (
     DEFAULT_PORT,
     DEFAULT_UNIT_ID,
     DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SCAN_INTERVAL_MIN,
+    DEFAULT_SCAN_INTERVAL_MAX,
     DEFAULT_REGISTER_OFFSET,
+    DEFAULT_MAX_READ_GAP,
+    DEFAULT_GROUP_INTERVALS,
+    DEFAULT_PIPELINE_DEPTH,
+    DEFAULT_DEADBANDS,
+    DEFAULT_MIN_WRITE_INTERVAL,
+    DEFAULT_MAX_WRITE_INTERVAL,
+    DEFAULT_CAPTURE_MAX_SIZE,
+    DEFAULT_SAMPLE_INTERVAL,
+    MIN_SAMPLE_INTERVAL,
+    MAX_PIPELINE_DEPTH,
+    MAX_READ_REGISTERS,
+    MODE_SIMPLE,
+    MODE_SUNSPEC,
+    DEFAULT_RSCP_PORT,
+    DEFAULT_REGISTER_MAP,
+    TRANSPORT_MODBUS,
+    TRANSPORT_RSCP,
 )
-from .modbus import E3DCModbusClient
+from .probe import async_probe_cached
+from .registers import available_register_maps
 
 _LOGGER = logging.getLogger(__name__)
 
+TRANSPORTS = {
+    TRANSPORT_MODBUS: "Modbus/TCP (Simple Mode)",
+    TRANSPORT_RSCP: "RSCP",
+}
+
 WALLBOX_TYPES = {
     "classic": "Wallbox classic",
     "easy_connect": "Wallbox easy connect",
@@ -30,11 +57,31 @@ class E3DCConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     _discovered_host = None
     _discovered_port = None
     _discovered_name = None
+    _user_input = None
+    _scan_results = None
 
     async def async_step_user(self, user_input=None):
+        # Manuell eintragen oder das lokale Netz durchsuchen (viele
+        # Geräte melden sich nicht per Zeroconf)
+        return self.async_show_menu(
+            step_id="user",
+            menu_options=["manual", "scan"],
+        )
+
+    async def async_step_manual(self, user_input=None):
         errors = {}
 
+        if user_input is not None and (
+            user_input.get("transport") == TRANSPORT_RSCP
+        ):
+            self._user_input = user_input
+            return await self.async_step_rscp()
+
         if user_input is not None:
+            # Bereits eingerichtete Geräte nicht erneut prüfen
+            await self.async_set_unique_id(user_input["host"])
+            self._abort_if_unique_id_configured()
+
             try:
                 await self._validate_input(self.hass, user_input)
             except CannotConnect:
@@ -42,15 +89,13 @@ class E3DCConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             except Exception:
                 errors["base"] = "unknown"
             else:
-                await self.async_set_unique_id(user_input["host"])
-                self._abort_if_unique_id_configured()
-
                 return self.async_create_entry(
                     title=f"E3/DC {user_input['host']}",
                     data={
                         "host": user_input["host"],
                         "port": user_input["port"],
                         "unit_id": user_input["unit_id"],
+                        "mode": user_input.get("mode", MODE_SIMPLE),
                         "register_offset": user_input["register_offset"],
                     },
                     options={
@@ -67,6 +112,9 @@ class E3DCConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         schema = vol.Schema(
             {
                 vol.Required("host"): str,
+                vol.Optional(
+                    "transport", default=TRANSPORT_MODBUS
+                ): vol.In(TRANSPORTS),
                 vol.Optional("port", default=DEFAULT_PORT): int,
                 vol.Optional("unit_id", default=DEFAULT_UNIT_ID): int,
                 vol.Optional(
@@ -81,11 +129,153 @@ class E3DCConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
         return self.async_show_form(
-            step_id="user",
+            step_id="manual",
+            data_schema=schema,
+            errors=errors,
+        )
+
+    async def async_step_scan(self, user_input=None):
+        errors = {}
+
+        if user_input is not None:
+            from .discovery import async_discover
+
+            try:
+                found = await async_discover(
+                    self.hass,
+                    user_input["network"],
+                    (user_input["port"],),
+                )
+            except ValueError:
+                errors["network"] = "invalid_network"
+            else:
+                configured = self._async_current_ids()
+                self._scan_results = {
+                    f"{host}:{port}": (host, port, result)
+                    for host, port, result in found
+                    if result[0] == MODE_SIMPLE and host not in configured
+                }
+                if self._scan_results:
+                    return await self.async_step_pick()
+                errors["base"] = "no_devices_found"
+
+        schema = vol.Schema(
+            {
+                vol.Required(
+                    "network",
+                    default=await self._async_default_network(),
+                ): str,
+                vol.Optional("port", default=DEFAULT_PORT): int,
+            }
+        )
+
+        return self.async_show_form(
+            step_id="scan",
             data_schema=schema,
             errors=errors,
         )
 
+    async def async_step_pick(self, user_input=None):
+        if user_input is not None:
+            host, port, _ = self._scan_results[user_input["device"]]
+
+            await self.async_set_unique_id(host)
+            self._abort_if_unique_id_configured()
+
+            self._discovered_host = host
+            self._discovered_port = port
+            self._discovered_name = host
+            # Magic wurde bei der Suche geprüft (Probe-Cache)
+            return await self.async_step_confirm({})
+
+        devices = {
+            key: f"{host}:{port} (Offset {result[1]})"
+            for key, (host, port, result) in self._scan_results.items()
+        }
+
+        return self.async_show_form(
+            step_id="pick",
+            data_schema=vol.Schema({vol.Required("device"): vol.In(devices)}),
+        )
+
+    async def _async_default_network(self):
+        # /24 der Home-Assistant-Adresse als Vorschlag
+        from homeassistant.components import network
+
+        try:
+            source_ip = await network.async_get_source_ip(self.hass)
+        except Exception as err:
+            _LOGGER.debug("No source IP for network scan: %s", err)
+            return ""
+        return str(ipaddress.ip_network(f"{source_ip}/24", strict=False))
+
+    async def async_step_rscp(self, user_input=None):
+        # Zugangsdaten für RSCP (Portal-Benutzer und RSCP-Passwort aus
+        # dem Gerätemenü)
+        errors = {}
+        host = self._user_input["host"]
+
+        if user_input is not None:
+            try:
+                await self._validate_rscp(user_input)
+            except CannotConnect:
+                errors["base"] = "cannot_connect"
+            except Exception:
+                errors["base"] = "unknown"
+            else:
+                await self.async_set_unique_id(host)
+                self._abort_if_unique_id_configured()
+
+                return self.async_create_entry(
+                    title=f"E3/DC {host}",
+                    data={
+                        "host": host,
+                        "transport": TRANSPORT_RSCP,
+                        "port": user_input["port"],
+                        "username": user_input["username"],
+                        "password": user_input["password"],
+                        "rscp_key": user_input["rscp_key"],
+                    },
+                    options={
+                        "scan_interval": DEFAULT_SCAN_INTERVAL,
+                        "wallboxes": self._user_input.get("wallboxes", 1),
+                        "wallbox_type": "classic",
+                    },
+                )
+
+        schema = vol.Schema(
+            {
+                vol.Required("username"): str,
+                vol.Required("password"): str,
+                vol.Required("rscp_key"): str,
+                vol.Optional("port", default=DEFAULT_RSCP_PORT): int,
+            }
+        )
+
+        return self.async_show_form(
+            step_id="rscp",
+            data_schema=schema,
+            errors=errors,
+            description_placeholders={"host": host},
+        )
+
+    async def _validate_rscp(self, data):
+        from .rscp import E3DCRscpClient
+
+        client = E3DCRscpClient(
+            host=self._user_input["host"],
+            port=data["port"],
+            username=data["username"],
+            password=data["password"],
+            rscp_key=data["rscp_key"],
+        )
+        try:
+            await client.connect()
+        except ConnectionError as err:
+            raise CannotConnect from err
+        finally:
+            await client.close()
+
     async def async_step_zeroconf(self, discovery_info):
         host = discovery_info.get("host")
         port = discovery_info.get("port", DEFAULT_PORT)
@@ -127,6 +317,7 @@ class E3DCConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                         "host": data["host"],
                         "port": data["port"],
                         "unit_id": data["unit_id"],
+                        "mode": data["mode"],
                         "register_offset": data["register_offset"],
                     },
                     options={
@@ -152,33 +343,15 @@ class E3DCConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         if not data.get("validate_magicbyte", True):
             return
 
-        detected = None
-        offsets = (0, -1, -2, 1, 2)
-
-        for offset in offsets:
-            client = E3DCModbusClient(
-                host=data["host"],
-                port=data["port"],
-                unit_id=data["unit_id"],
-                register_offset=offset,
+        try:
+            detected = await async_probe_cached(
+                hass,
+                data["host"],
+                data["port"],
+                data["unit_id"],
             )
-            await client.connect()
-            try:
-                regs = await client.read_holding_registers(40001, 1)
-                if regs[0] == 0xE3DC:
-                    detected = ("e3dc", offset, regs)
-                    break
-
-                regs = await client.read_holding_registers(40001, 2)
-                if regs[0] == 0x5375 and regs[1] == 0x6E53:
-                    detected = ("sunspec", offset, regs)
-                    break
-            except Exception as err:
-                _LOGGER.debug(
-                    "Magic check failed (offset %s): %s", offset, err
-                )
-            finally:
-                await client.close()
+        except (ConnectionError, asyncio.TimeoutError) as err:
+            raise CannotConnect from err
 
         if not detected:
             raise HomeAssistantError(
@@ -193,11 +366,12 @@ class E3DCConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             regs,
         )
 
-        if mode == "sunspec":
+        if mode == MODE_SUNSPEC:
             raise HomeAssistantError(
                 "SunSpec mode detected; Simple Mode required"
             )
 
+        data["mode"] = mode
         data["register_offset"] = offset
 
     @staticmethod
@@ -213,6 +387,11 @@ class E3DCOptionsFlow(config_entries.OptionsFlow):
         if user_input is not None:
             return self.async_create_entry(title="", data=user_input)
 
+        # Mitgelieferte Register-Maps (maps/*.json)
+        register_maps = await self.hass.async_add_executor_job(
+            available_register_maps
+        )
+
         schema = vol.Schema(
             {
                 vol.Required(
@@ -221,6 +400,29 @@ class E3DCOptionsFlow(config_entries.OptionsFlow):
                         "scan_interval", DEFAULT_SCAN_INTERVAL
                     ),
                 ): vol.All(int, vol.Range(min=2, max=60)),
+                vol.Required(
+                    "adaptive_scan",
+                    default=self._entry.options.get("adaptive_scan", False),
+                ): bool,
+                vol.Required(
+                    "scan_interval_min",
+                    default=self._entry.options.get(
+                        "scan_interval_min", DEFAULT_SCAN_INTERVAL_MIN
+                    ),
+                ): vol.All(int, vol.Range(min=1, max=60)),
+                vol.Required(
+                    "scan_interval_max",
+                    default=self._entry.options.get(
+                        "scan_interval_max", DEFAULT_SCAN_INTERVAL_MAX
+                    ),
+                ): vol.All(int, vol.Range(min=2, max=600)),
+                vol.Required(
+                    "slow_scan_interval",
+                    default=self._entry.options.get(
+                        "slow_scan_interval",
+                        DEFAULT_GROUP_INTERVALS["slow"],
+                    ),
+                ): vol.All(int, vol.Range(min=10, max=3600)),
                 vol.Required(
                     "wallboxes",
                     default=self._entry.options.get("wallboxes", 1),
@@ -240,12 +442,95 @@ class E3DCOptionsFlow(config_entries.OptionsFlow):
                         ),
                     ),
                 ): vol.All(int, vol.Range(min=-2, max=2)),
+                vol.Required(
+                    "register_map",
+                    default=self._entry.options.get(
+                        "register_map", DEFAULT_REGISTER_MAP
+                    ),
+                ): vol.In(register_maps),
                 vol.Required(
                     "validate_magicbyte",
                     default=self._entry.options.get(
                         "validate_magicbyte", True
                     ),
                 ): bool,
+                vol.Required(
+                    "max_read_gap",
+                    default=self._entry.options.get(
+                        "max_read_gap", DEFAULT_MAX_READ_GAP
+                    ),
+                ): vol.All(int, vol.Range(min=0, max=MAX_READ_REGISTERS)),
+                vol.Required(
+                    "pipeline_depth",
+                    default=self._entry.options.get(
+                        "pipeline_depth", DEFAULT_PIPELINE_DEPTH
+                    ),
+                ): vol.All(int, vol.Range(min=1, max=MAX_PIPELINE_DEPTH)),
+                vol.Required(
+                    "deadband_power",
+                    default=self._entry.options.get(
+                        "deadband_power", DEFAULT_DEADBANDS["power"]
+                    ),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=10000)),
+                vol.Required(
+                    "deadband_voltage",
+                    default=self._entry.options.get(
+                        "deadband_voltage", DEFAULT_DEADBANDS["voltage"]
+                    ),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+                vol.Required(
+                    "deadband_current",
+                    default=self._entry.options.get(
+                        "deadband_current", DEFAULT_DEADBANDS["current"]
+                    ),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+                vol.Required(
+                    "deadband_relative",
+                    default=self._entry.options.get("deadband_relative", 0),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=50)),
+                vol.Required(
+                    "min_write_interval",
+                    default=self._entry.options.get(
+                        "min_write_interval", DEFAULT_MIN_WRITE_INTERVAL
+                    ),
+                ): vol.All(int, vol.Range(min=0, max=3600)),
+                vol.Required(
+                    "max_write_interval",
+                    default=self._entry.options.get(
+                        "max_write_interval", DEFAULT_MAX_WRITE_INTERVAL
+                    ),
+                ): vol.All(int, vol.Range(min=0, max=86400)),
+                vol.Required(
+                    "import_statistics",
+                    default=self._entry.options.get(
+                        "import_statistics", False
+                    ),
+                ): bool,
+                vol.Required(
+                    "high_rate_sampling",
+                    default=self._entry.options.get(
+                        "high_rate_sampling", False
+                    ),
+                ): bool,
+                vol.Required(
+                    "sample_interval",
+                    default=self._entry.options.get(
+                        "sample_interval", DEFAULT_SAMPLE_INTERVAL
+                    ),
+                ): vol.All(
+                    vol.Coerce(float),
+                    vol.Range(min=MIN_SAMPLE_INTERVAL, max=2),
+                ),
+                vol.Required(
+                    "capture",
+                    default=self._entry.options.get("capture", False),
+                ): bool,
+                vol.Required(
+                    "capture_max_size",
+                    default=self._entry.options.get(
+                        "capture_max_size", DEFAULT_CAPTURE_MAX_SIZE
+                    ),
+                ): vol.All(int, vol.Range(min=1, max=1024)),
             }
         )
 
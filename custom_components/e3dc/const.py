@@ -1,53 +1,127 @@
 DOMAIN = "e3dc"
+DATA_SCHEDULER = f"{DOMAIN}_scheduler"
 
 DEFAULT_PORT = 502
 DEFAULT_UNIT_ID = 1
 DEFAULT_SCAN_INTERVAL = 5  # Sekunden
 DEFAULT_REGISTER_OFFSET = 0
 
-# ------------------------------------------------------------------
-# Modbus Register – E3/DC Simple Mode
-# Alle Adressen sind 1-basiert laut Doku V2.50
-# pymodbus arbeitet 0-basiert → -1 beim Zugriff
-# ------------------------------------------------------------------
-
-REGISTERS = {
-    # Leistungsdaten (Int32, 2 Register)
-    "pv_power":        {"addr": 40068, "len": 2, "type": "int32"},
-    "battery_power":   {"addr": 40070, "len": 2, "type": "int32"},
-    "house_power":     {"addr": 40072, "len": 2, "type": "int32"},
-    "grid_power":      {"addr": 40074, "len": 2, "type": "int32"},
-    "additional_feedin_power": {"addr": 40076, "len": 2, "type": "int32"},
-    "wallbox_power":   {"addr": 40078, "len": 2, "type": "int32"},
-    "wallbox_solar_power": {"addr": 40080, "len": 2, "type": "int32"},
-
-    # Status
-    "autarky_raw":     {"addr": 40082, "len": 1, "type": "uint16"},
-    "battery_soc":     {"addr": 40083, "len": 1, "type": "uint16"},
-    "emergency_power": {"addr": 40084, "len": 1, "type": "uint16"},
-    "ems_status":      {"addr": 40085, "len": 1, "type": "uint16"},
+# Transport: Modbus/TCP (Simple Mode) oder natives RSCP (rscp.py)
+TRANSPORT_MODBUS = "modbus"
+TRANSPORT_RSCP = "rscp"
+DEFAULT_RSCP_PORT = 5033
+# Ein RSCP-Abruf liefert alle Werte; so lange (s) bedient er die
+# Blöcke eines Polls
+RSCP_SNAPSHOT_AGE = 1.0
+
+# Zustandsschreiben: Deadband je Sensorfamilie (absolut) und
+# Mindest-/Höchstabstand zwischen zwei Schreibvorgängen (Sekunden)
+DEFAULT_DEADBANDS = {
+    "power": 10,
+    "voltage": 1,
+    "current": 0.05,
 }
-
-# ------------------------------------------------------------------
-# DC-Strings (vollständig, auch wenn nicht alle genutzt werden)
+DEFAULT_MIN_WRITE_INTERVAL = 0
+DEFAULT_MAX_WRITE_INTERVAL = 300
+
+# Energieintegration: längste überbrückte Lücke zwischen zwei Samples
+# (Sekunden) und Persistenz der Zählerstände
+ENERGY_MAX_GAP = 300
+ENERGY_SAVE_DELAY = 60
+ENERGY_STORE_VERSION = 1
+# Import der Stundenwerte als Langzeitstatistik: Energie-Sensoren
+# schreiben ihren Zustand dann nur noch in diesem Abstand (Sekunden)
+ENERGY_STATISTICS_WRITE_INTERVAL = 900
+
+# Antwort-Timeout pro Modbus-Transaktion (Sekunden)
+MODBUS_TIMEOUT = 3
+
+# Erkennung von Modus und Registeroffset im Config Flow: geprüfte
+# Offsets (in Vorzugsreihenfolge), Gesamtfrist und Cache-Dauer (s)
+PROBE_OFFSETS = (0, -1, -2, 1, 2)
+PROBE_DEADLINE = 8
+PROBE_CACHE_TTL = 600
+DATA_PROBE_CACHE = f"{DOMAIN}_probe_cache"
+MODE_SIMPLE = "e3dc"
+MODE_SUNSPEC = "sunspec"
+
+# Aktive Netzwerksuche (discovery.py): gleichzeitige Hosts, Timeouts
+# (Sekunden) für Verbindungsaufbau und Magic-Prüfung je Host, max.
+# Netzgröße
+DISCOVERY_CONCURRENCY = 128
+DISCOVERY_CONNECT_TIMEOUT = 1.0
+DISCOVERY_PROBE_TIMEOUT = 2.0
+DISCOVERY_MAX_HOSTS = 1024
+
+# Pipelining: max. gleichzeitig offene Transaktionen (1 = aus)
+DEFAULT_PIPELINE_DEPTH = 1
+MAX_PIPELINE_DEPTH = 16
+
+# Reconnect-Backoff (Sekunden, exponentiell)
+RECONNECT_BACKOFF_MIN = 1
+RECONNECT_BACKOFF_MAX = 60
+
+# Quarantäne für wiederholt fehlschlagende Register/Blöcke
+QUARANTINE_THRESHOLD = 3
+QUARANTINE_BACKOFF_MIN = 30
+QUARANTINE_BACKOFF_MAX = 3600
+
+# Gleichzeitige Polls über alle E3/DC-Einträge (Fleet-Scheduler)
+FLEET_MAX_CONCURRENT = 4
+
+# Mitschnitt der Rohregister (capture.py): Dateikennung, Größenlimit
+# (MB) und Verzögerung, mit der gepufferte Blöcke geschrieben werden
+CAPTURE_MAGIC = b"E3DCCAP1"
+DEFAULT_CAPTURE_MAX_SIZE = 50
+CAPTURE_FLUSH_DELAY = 10
+
+# Obergrenzen (ms) der Latenz-Histogramme pro Block/Transaktion
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000)
+
+# Adaptives Abfrageintervall: Grenzen (Sekunden), Leistungsänderung
+# (W) ab der schnell abgefragt wird, Faktor für ruhige Phasen
+DEFAULT_SCAN_INTERVAL_MIN = 2
+DEFAULT_SCAN_INTERVAL_MAX = 60
+ADAPTIVE_CHANGE_THRESHOLD = 200
+ADAPTIVE_SLOWDOWN_FACTOR = 1.5
+ADAPTIVE_KEYS = (
+    "pv_power",
+    "battery_power",
+    "house_power",
+    "grid_power",
+    "wallbox_power",
+)
+
+# Hochfrequente Abtastung der Leistungsregister (sampler.py):
+# Intervall (s), Größe des Ringpuffers pro Kanal, veröffentlichtes Perzentil
+DEFAULT_SAMPLE_INTERVAL = 0.25
+MIN_SAMPLE_INTERVAL = 0.1
+SAMPLE_BUFFER_SIZE = 1024
+SAMPLE_PERCENTILE = 95
+SAMPLE_CHANNELS = (
+    "pv_power",
+    "battery_power",
+    "house_power",
+    "grid_power",
+    "additional_feedin_power",
+    "wallbox_power",
+    "wallbox_solar_power",
+)
+
+# Modbus erlaubt max. 125 Register pro Read Holding Registers
+MAX_READ_REGISTERS = 125
+# Lücken bis zu dieser Größe werden beim Blocklesen mitgelesen
+DEFAULT_MAX_READ_GAP = 16
+
+# ------------------------------------------------------------------
+# Registerdefinitionen: deklarative Maps je Firmware/Modell in maps/
+# (registers.py). Alle Adressen sind 1-basiert laut Doku V2.50,
+# pymodbus arbeitet 0-basiert → -1 beim Zugriff
 # ------------------------------------------------------------------
 
-DC_STRINGS = {
-    # Spannung
-    "dc_string_1_voltage": {"addr": 40096, "len": 1, "type": "uint16"},
-    "dc_string_2_voltage": {"addr": 40097, "len": 1, "type": "uint16"},
-    "dc_string_3_voltage": {"addr": 40098, "len": 1, "type": "uint16"},
-
-    # Strom (Faktor 0,01)
-    "dc_string_1_current": {"addr": 40099, "len": 1, "type": "uint16", "scale": 0.01},
-    "dc_string_2_current": {"addr": 40100, "len": 1, "type": "uint16", "scale": 0.01},
-    "dc_string_3_current": {"addr": 40101, "len": 1, "type": "uint16", "scale": 0.01},
-
-    # Leistung
-    "dc_string_1_power":   {"addr": 40102, "len": 1, "type": "uint16"},
-    "dc_string_2_power":   {"addr": 40103, "len": 1, "type": "uint16"},
-    "dc_string_3_power":   {"addr": 40104, "len": 1, "type": "uint16"},
-}
+DEFAULT_REGISTER_MAP = "simple_mode"
+REGISTER_MAP_VERSION = 1
+DATA_REGISTER_MAPS = f"{DOMAIN}_register_maps"
 
 # ------------------------------------------------------------------
 # EMS Status Bits – Register 40085
@@ -63,36 +137,6 @@ EMS_BITS = {
     6: "discharge_lock_time_active",
 }
 
-# ------------------------------------------------------------------
-# Leistungsmesser Typ 1 (Hausanschlusspunkt / Regelpunkt)
-# Int32 – Energy-Dashboard-tauglich
-# ------------------------------------------------------------------
-
-POWER_METER_TYPE_1 = {
-    "grid_l1": {"addr": 40138, "len": 2, "type": "int32"},
-    "grid_l2": {"addr": 40140, "len": 2, "type": "int32"},
-    "grid_l3": {"addr": 40142, "len": 2, "type": "int32"},
-}
-
-# ------------------------------------------------------------------
-# System information (Strings, Simple Mode)
-# ------------------------------------------------------------------
-
-SYSTEM_INFO = {
-    "manufacturer": {"addr": 40004, "len": 16, "type": "string"},
-    "model": {"addr": 40020, "len": 16, "type": "string"},
-    "serial_number": {"addr": 40036, "len": 16, "type": "string"},
-    "firmware_release": {"addr": 40052, "len": 16, "type": "string"},
-}
-
-# ------------------------------------------------------------------
-# SG-Ready status (Read-Only)
-# ------------------------------------------------------------------
-
-SG_READY = {
-    "sg_ready_status": {"addr": 40137, "len": 1, "type": "uint16"},
-}
-
 # ------------------------------------------------------------------
 # Wallbox – Basis
 # ------------------------------------------------------------------
@@ -100,6 +144,11 @@ SG_READY = {
 WALLBOX_BASE_ADDR = 40088
 MAX_WALLBOXES = 8
 
+# Bitänderungen innerhalb dieses Fensters werden zu einem Schreibvorgang
+# zusammengefasst; danach wird das Register einmal zur Kontrolle gelesen
+WALLBOX_WRITE_WINDOW = 0.2
+WALLBOX_VERIFY_DELAY = 1.0
+
 # ------------------------------------------------------------------
 # Wallbox-Typen – schreibbare Bits (R/W)
 # Nur diese Bits dürfen aktiv gesetzt werden!
@@ -141,3 +190,21 @@ WALLBOX_STATUS_BITS = {
     7: "schuko_plugged",
     8: "schuko_locked",
 }
+
+# ------------------------------------------------------------------
+# Abfragegruppen (Feld "group" der Registerdefinitionen)
+# static: einmal pro Verbindung (Identität)
+# slow:   Diagnosewerte, eigenes Intervall
+# fast:   Leistungsflüsse, bei jeder Abfrage
+# ------------------------------------------------------------------
+
+# Gestaffelter Start: nur diese Gruppen vor dem Einrichten der
+# Plattformen lesen, die übrigen im Hintergrund nachladen
+ESSENTIAL_GROUPS = ("fast",)
+
+# Sekunden; None = einmal pro Verbindung, 0 = bei jeder Abfrage
+DEFAULT_GROUP_INTERVALS = {
+    "static": None,
+    "slow": 60,
+    "fast": 0,
+}
@@ -1,37 +1,175 @@
+import asyncio
 import logging
+import time
 from datetime import timedelta
 
+from homeassistant.core import callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
 
 from .const import (
-    REGISTERS,
-    DC_STRINGS,
-    POWER_METER_TYPE_1,
+    DOMAIN,
     EMS_BITS,
-    SYSTEM_INFO,
-    SG_READY,
+    DEFAULT_GROUP_INTERVALS,
+    ESSENTIAL_GROUPS,
     WALLBOX_BASE_ADDR,
     MAX_WALLBOXES,
     DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SCAN_INTERVAL_MIN,
+    DEFAULT_SCAN_INTERVAL_MAX,
+    DEFAULT_MAX_READ_GAP,
+    ADAPTIVE_CHANGE_THRESHOLD,
+    ADAPTIVE_SLOWDOWN_FACTOR,
+    ADAPTIVE_KEYS,
+    ENERGY_MAX_GAP,
+    WALLBOX_STATUS_BITS,
 )
+from .energy import EnergyEngine
+from .planner import build_read_plan
+from .quarantine import RegisterQuarantine
+from .registers import load_register_map
 
 _LOGGER = logging.getLogger(__name__)
 
+# Register, aus denen die Geräteidentität gebildet wird
+IDENTITY_KEYS = ("manufacturer", "model", "serial_number", "firmware_release")
+
+# Abgeleitete Werte, die sich mit dem jeweiligen Rohregister ändern
+DERIVED_KEYS = {
+    "ems_status": ("ems",),
+    "autarky_raw": ("autarky", "self_consumption"),
+}
+
+CAR_CHARGING_BIT = next(
+    bit for bit, name in WALLBOX_STATUS_BITS.items() if name == "car_charging"
+)
+
+
+def wallbox_registers(wallboxes):
+    # Wallbox CTRL Register (40088–40095), je Wallbox ein Register
+    return {
+        f"wallbox_ctrl_{wb}": {
+            "addr": WALLBOX_BASE_ADDR + wb,
+            "len": 1,
+            "type": "uint16",
+        }
+        for wb in range(min(wallboxes, MAX_WALLBOXES))
+    }
+
 
 class E3DCCoordinator(DataUpdateCoordinator):
-    def __init__(self, hass, client, scan_interval=None):
+    def __init__(
+        self,
+        hass,
+        client,
+        scan_interval=None,
+        max_read_gap=None,
+        slow_interval=None,
+        wallboxes=1,
+        entry_id=None,
+        adaptive=False,
+        scan_interval_min=None,
+        scan_interval_max=None,
+        register_map=None,
+    ):
+        if register_map is None:
+            # Benchmarks/Tests; Home Assistant lädt die Map vorab im
+            # Executor (async_get_register_map)
+            register_map = load_register_map()
+        self.register_map = register_map
+
         self._client = client
+        self._entry_id = entry_id
+        self._wallboxes = min(wallboxes, MAX_WALLBOXES)
+
+        # Adaptives Intervall: schnell bei Bewegung, langsam wenn ruhig
+        self._adaptive = adaptive
+        self._interval_min = scan_interval_min or DEFAULT_SCAN_INTERVAL_MIN
+        self._interval_max = scan_interval_max or DEFAULT_SCAN_INTERVAL_MAX
+        self._last_power = {}
+
+        if max_read_gap is None:
+            max_read_gap = DEFAULT_MAX_READ_GAP
+        self._max_read_gap = max_read_gap
+
+        # Je Gruppe ein eigener Leseplan, eigenes Intervall und Cache
+        # Nur die konfigurierten Wallboxen lesen, zusammen mit den
+        # Leistungsdaten (40088 folgt direkt auf 40085)
+        groups = {
+            group: (fields,) for group, fields in register_map.groups.items()
+        }
+        groups["fast"] = groups.get("fast", ()) + (
+            wallbox_registers(wallboxes),
+        )
+
+        # Transporte mit eingeschränktem Registerabbild (RSCP)
+        supported = client.supported_keys
+        if supported is not None:
+            groups = {
+                group: tuple(
+                    {k: r for k, r in table.items() if k in supported}
+                    for table in tables
+                )
+                for group, tables in groups.items()
+            }
+
+        self._read_plans = {
+            group: build_read_plan(tables, max_gap=max_read_gap)
+            for group, tables in groups.items()
+        }
+        self._group_intervals = dict(DEFAULT_GROUP_INTERVALS)
+        if slow_interval:
+            self._group_intervals["slow"] = slow_interval
+
+        self._group_data = {group: {} for group in groups}
+        self._group_last_read = {}
+        self._static_connection_id = None
+
+        # Gestaffelter Start (async_first_refresh_staged)
+        self._staged = False
+        self._hydration = None
+
+        self._key_plans = {}
+        self._key_listeners = {}
+
+        # Optionale hochfrequente Abtastung (sampler.py) und Import der
+        # Energie-Stundenwerte als Langzeitstatistik (statistics.py)
+        self.sampler = None
+        self.statistics = None
+
+        self.quarantine = RegisterQuarantine()
+        # Längste noch integrierte Lücke zwischen zwei Polls; muss auch
+        # das höchste adaptive Intervall (bis 600 s) samt Verzögerung
+        # überbrücken, sonst wächst die Energie nicht mehr
+        self._energy_max_gap = ENERGY_MAX_GAP
+        if adaptive:
+            self._energy_max_gap = max(
+                ENERGY_MAX_GAP, 2 * self._interval_max
+            )
+        self.energy = EnergyEngine(
+            hass, entry_id, max_gap=self._energy_max_gap
+        )
+
+        # Eine DeviceInfo für alle Entities dieses Eintrags
+        self._identity = None
+        self.device_info = self._build_device_info({})
+
+        # Das Intervall wird vom FleetScheduler (scheduler.py) umgesetzt,
+        # der die Abfragen aller Einträge zeitlich verteilt
+        self.scan_interval = timedelta(
+            seconds=scan_interval or DEFAULT_SCAN_INTERVAL
+        )
+        self.poll_lag = 0.0
 
         super().__init__(
             hass,
             _LOGGER,
             name="E3/DC Modbus Coordinator",
-            update_interval=timedelta(
-                seconds=scan_interval or DEFAULT_SCAN_INTERVAL
-            ),
+            update_interval=None,
         )
 
     async def _async_update_data(self):
@@ -40,64 +178,473 @@ class E3DCCoordinator(DataUpdateCoordinator):
 
             # --------------------------------------------------
             # Basisregister, DC-Strings, Leistungsmesser
+            # (Gruppen mit eigenem Intervall, Blöcke siehe planner.py)
             # --------------------------------------------------
-            for source in (
-                REGISTERS,
-                DC_STRINGS,
-                POWER_METER_TYPE_1,
-                SYSTEM_INFO,
-                SG_READY,
-            ):
-                for key, reg in source.items():
-                    try:
-                        value = await self._client.read_value(reg)
-                        scale = reg.get("scale")
-                        data[key] = value * scale if scale else value
-                    except Exception as err:
-                        _LOGGER.debug(
-                            "Register %s (%s) failed: %s",
-                            key,
-                            reg["addr"],
-                            err,
-                        )
-                        data[key] = None
+            now = time.monotonic()
+            self._client.stats.poll_started(now)
+            due = [
+                group for group in self._read_plans
+                if self._group_due(group, now)
+            ]
+            group_data = {group: {} for group in due}
 
-            # --------------------------------------------------
-            # Wallbox CTRL Register (40088–40095)
-            # --------------------------------------------------
-            for wb in range(MAX_WALLBOXES):
-                addr = WALLBOX_BASE_ADDR + wb
-                try:
-                    regs = await self._client.read_holding_registers(addr, 1)
-                    data[f"wallbox_ctrl_{wb}"] = regs[0]
-                except Exception as err:
-                    _LOGGER.debug(
-                        "Wallbox CTRL %s (%s) failed: %s",
-                        wb,
-                        addr,
-                        err,
+            # Alle fälligen Blöcke gleichzeitig anstoßen; ohne Pipelining
+            # serialisiert der Client sie über seinen Lock
+            skipped = await asyncio.gather(
+                *(
+                    self._async_read_block(
+                        block,
+                        group_data[group],
+                        self._group_data[group],
                     )
-                    data[f"wallbox_ctrl_{wb}"] = None
+                    for group in due
+                    for block in self._read_plans[group]
+                )
+            )
 
-            # --------------------------------------------------
-            # EMS Status Bits
-            # --------------------------------------------------
-            ems_raw = data.get("ems_status")
-            data["ems"] = {}
+            if skipped and all(skipped):
+                # Kein einziger Block gelesen: Abfrage als fehlgeschlagen
+                # melden statt lauter leerer Werte
+                raise UpdateFailed("Connection to the device lost")
+
+            sample_time = time.monotonic()
 
-            if ems_raw is not None:
-                for bit, name in EMS_BITS.items():
-                    data["ems"][name] = bool(ems_raw & (1 << bit))
+            for group in self._read_plans:
+                if group in group_data:
+                    self._group_data[group] = group_data[group]
+                    self._group_read_done(group, group_data[group], now)
+
+                data.update(self._group_data[group])
+
+            self._derive_values(data)
 
             # --------------------------------------------------
-            # Autarky / Self-consumption (2x 8-bit in 40082)
+            # Energie (ein Integrationsschritt für alle Kanäle)
             # --------------------------------------------------
-            autarky_raw = data.get("autarky_raw")
-            if autarky_raw is not None:
-                data["autarky"] = (autarky_raw >> 8) & 0xFF
-                data["self_consumption"] = autarky_raw & 0xFF
+            if "fast" in group_data:
+                self.energy.add_sample(data, sample_time)
+                if self.statistics is not None:
+                    self.statistics.add_sample(self.energy.totals)
+                self._adapt_interval(data)
+
+            if self.sampler is not None:
+                data.update(self.sampler.aggregates())
+
+            data["effective_scan_interval"] = (
+                self.scan_interval.total_seconds()
+            )
+            data["poll_lag"] = round(self.poll_lag, 3)
+            self._add_poll_stats(data)
+
+            self._update_device_info(data)
 
             return data
 
         except Exception as err:
+            self._client.stats.poll_aborted()
             raise UpdateFailed(str(err)) from err
+
+    def _add_poll_stats(self, data):
+        stats = self._client.stats
+        poll = stats.poll_finished(time.monotonic())
+
+        data["poll_duration"] = round(poll["duration"], 3)
+        data["poll_transactions"] = poll["transactions"]
+        data["poll_bytes_read"] = poll["bytes_read"]
+        data["poll_lock_wait"] = round(poll["lock_wait"], 3)
+        data["modbus_errors"] = stats.totals["errors"]
+        data["modbus_timeouts"] = stats.totals["timeouts"]
+        data["reconnects"] = self._client.reconnect_count
+
+    @staticmethod
+    def _derive_values(data):
+        # --------------------------------------------------
+        # EMS Status Bits
+        # --------------------------------------------------
+        ems_raw = data.get("ems_status")
+        data["ems"] = {}
+
+        if ems_raw is not None:
+            for bit, name in EMS_BITS.items():
+                data["ems"][name] = bool(ems_raw & (1 << bit))
+
+        # --------------------------------------------------
+        # Autarky / Self-consumption (2x 8-bit in 40082)
+        # --------------------------------------------------
+        autarky_raw = data.get("autarky_raw")
+        if autarky_raw is not None:
+            data["autarky"] = (autarky_raw >> 8) & 0xFF
+            data["self_consumption"] = autarky_raw & 0xFF
+
+    # --------------------------------------------------
+    # Gezielte Aktualisierung einzelner Werte
+    # --------------------------------------------------
+
+    @callback
+    def async_add_key_listener(self, keys, update_callback):
+        for key in keys:
+            self._key_listeners.setdefault(key, set()).add(update_callback)
+
+        @callback
+        def remove_listener():
+            for key in keys:
+                self._key_listeners.get(key, set()).discard(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_update_key_listeners(self, keys):
+        callbacks = set()
+        for key in keys:
+            callbacks |= self._key_listeners.get(key, set())
+            for derived in DERIVED_KEYS.get(key, ()):
+                callbacks |= self._key_listeners.get(derived, set())
+
+        for update_callback in callbacks:
+            update_callback()
+
+    async def async_refresh_keys(self, keys):
+        # Nur die Register der angefragten Werte lesen (statt eines
+        # kompletten Polls) und nur die abhängigen Entities benachrichtigen
+        keys = frozenset(keys)
+        plan = self._key_plans.get(keys)
+        if plan is None:
+            plan = self._key_plans[keys] = self._build_key_plan(keys)
+
+        updated = {}
+        lost = False
+        for block in plan:
+            block_data = {}
+            if await self._async_read_block(block, block_data, self.data):
+                # Verbindung weg: bisherige Werte behalten
+                lost = True
+                break
+            # Fehlgeschlagene Register überschreiben keine gültigen Werte
+            updated.update(
+                (key, value)
+                for key, value in block_data.items()
+                if value is not None
+            )
+
+        for group_data in self._group_data.values():
+            for key in group_data.keys() & updated.keys():
+                group_data[key] = updated[key]
+
+        self.data.update(updated)
+        self._derive_values(self.data)
+        self.async_update_key_listeners(updated)
+
+        if lost:
+            raise UpdateFailed("Connection to the device lost")
+
+    def provides(self, key):
+        # Register, die der Transport nicht liefert (RSCP), bekommen
+        # keine Entities; abgeleitete Werte hängen an ihren Registern
+        supported = self._client.supported_keys
+        return (
+            supported is None
+            or key not in self.register_map.fields
+            or key in supported
+        )
+
+    @property
+    def supports_write(self):
+        return self._client.supports_write
+
+    def _build_key_plan(self, keys):
+        fields = {
+            key: reg
+            for plan in self._read_plans.values()
+            for block in plan
+            for key, reg in block.fields
+            if key in keys
+        }
+        return build_read_plan((fields,), max_gap=self._max_read_gap)
+
+    # --------------------------------------------------
+    # Gestaffelter Start
+    # --------------------------------------------------
+
+    async def async_first_refresh_staged(self):
+        # Erst nur die Leistungsdaten (ein Block), damit die Entities
+        # sofort verfügbar sind; Identität, DC-Strings und Leistungsmesser
+        # folgen im Hintergrund
+        self._staged = True
+        try:
+            await self.async_config_entry_first_refresh()
+        except Exception:
+            self._staged = False
+            raise
+
+        self._hydration = self.hass.async_create_background_task(
+            self._async_hydrate(),
+            f"e3dc hydrate {self._entry_id}",
+        )
+
+    async def _async_hydrate(self):
+        try:
+            for group in self._read_plans:
+                if group in ESSENTIAL_GROUPS:
+                    continue
+
+                now = time.monotonic()
+                group_data = {}
+                await asyncio.gather(
+                    *(
+                        self._async_read_block(
+                            block,
+                            group_data,
+                            self._group_data[group],
+                        )
+                        for block in self._read_plans[group]
+                    )
+                )
+                self._group_data[group] = group_data
+                self._group_read_done(group, group_data, now)
+
+                # Jede Gruppe sofort veröffentlichen
+                self.data.update(group_data)
+                self._update_device_info(self.data)
+                self.async_update_key_listeners(group_data)
+        except Exception as err:
+            _LOGGER.debug("Background hydration failed: %s", err)
+        finally:
+            # Fehlende Gruppen holt der nächste reguläre Poll nach
+            self._staged = False
+            self._hydration = None
+
+    async def async_shutdown(self):
+        if self._hydration is not None:
+            self._hydration.cancel()
+        await super().async_shutdown()
+
+    async def async_backfill_energy(self):
+        # Nach einer Unterbrechung die Energie aus der Geräte-Historie
+        # nachtragen (nur Transporte mit Historie, z. B. RSCP)
+        last = self.energy.last_sample_time
+        if not self._client.supports_history or last is None:
+            return
+
+        gap = time.time() - last
+        if gap <= self._energy_max_gap:
+            return
+
+        try:
+            energy = await self._client.async_read_history(last, gap)
+        except Exception as err:
+            _LOGGER.warning("Energy backfill failed: %s", err)
+            return
+
+        for key, value in energy.items():
+            self.energy.add_energy(key, value)
+        _LOGGER.debug("Backfilled %.0fs of energy: %s", gap, energy)
+
+    def _adapt_interval(self, data):
+        power = {key: data.get(key) for key in ADAPTIVE_KEYS}
+        last_power, self._last_power = self._last_power, power
+
+        if not self._adaptive:
+            return
+
+        changed = any(
+            value is not None
+            and last_power.get(key) is not None
+            and abs(value - last_power[key]) >= ADAPTIVE_CHANGE_THRESHOLD
+            for key, value in power.items()
+        )
+        charging = any(
+            (data.get(f"wallbox_ctrl_{wb}") or 0) & (1 << CAR_CHARGING_BIT)
+            for wb in range(self._wallboxes)
+        )
+
+        if changed or charging:
+            seconds = self._interval_min
+        else:
+            seconds = min(
+                self.scan_interval.total_seconds()
+                * ADAPTIVE_SLOWDOWN_FACTOR,
+                self._interval_max,
+            )
+
+        self.scan_interval = timedelta(
+            seconds=max(seconds, self._interval_min)
+        )
+
+    def _build_device_info(self, data):
+        return DeviceInfo(
+            identifiers={(DOMAIN, self._entry_id)},
+            manufacturer=data.get("manufacturer") or "HagerEnergy / E3/DC",
+            model=data.get("model"),
+            serial_number=data.get("serial_number"),
+            sw_version=data.get("firmware_release"),
+            name="E3/DC Energiespeichersystem",
+        )
+
+    def _update_device_info(self, data):
+        identity = tuple(data.get(key) for key in IDENTITY_KEYS)
+        if identity == self._identity:
+            return
+
+        first = self._identity is None
+        self._identity = identity
+        self.device_info = self._build_device_info(data)
+
+        if first:
+            # Beim ersten Lesen legen die Entities das Gerät an
+            return
+
+        # z. B. nach einem Firmware-Update: Geräteregister einmal anpassen
+        registry = dr.async_get(self.hass)
+        device = registry.async_get_device(
+            identifiers={(DOMAIN, self._entry_id)}
+        )
+        if device is not None:
+            registry.async_update_device(
+                device.id,
+                manufacturer=self.device_info["manufacturer"],
+                model=self.device_info["model"],
+                serial_number=self.device_info["serial_number"],
+                sw_version=self.device_info["sw_version"],
+            )
+
+    def _group_due(self, group, now):
+        if self._staged and group not in ESSENTIAL_GROUPS:
+            # Wird von _async_hydrate nachgeladen
+            return False
+
+        interval = self._group_intervals[group]
+
+        if interval is None:
+            # einmal pro Verbindung
+            return (
+                group not in self._group_last_read
+                or self._static_connection_id != self._client.connection_id
+            )
+
+        last = self._group_last_read.get(group)
+        return last is None or now - last >= interval
+
+    def _group_read_done(self, group, group_data, now):
+        if self._group_intervals[group] is None:
+            # Statische Werte erst als gelesen markieren, wenn alle da sind
+            if any(value is None for value in group_data.values()):
+                self._group_last_read.pop(group, None)
+                return
+            self._static_connection_id = self._client.connection_id
+
+        self._group_last_read[group] = now
+
+    async def _async_read_block(self, block, data, previous):
+        # True, wenn der Block wegen der Verbindung übersprungen wurde
+        name = f"block {block.name}"
+
+        # Gesperrte Blöcke ohne Lücken und ohne gesperrte Felder neu
+        # aufteilen und diese Teilblöcke lesen
+        if self.quarantine.is_quarantined(name):
+            return await self._async_read_split(block, data, previous)
+
+        try:
+            regs = await self._client.read_holding_registers(
+                block.start,
+                block.count,
+            )
+        except ConnectionError as err:
+            # Verbindung weg: nicht dem Block anlasten, keine Einzelreads
+            _LOGGER.debug("Block %s skipped: %s", block.name, err)
+            for key, _ in block.fields:
+                data[key] = None
+            return True
+        except Exception as err:
+            _LOGGER.debug(
+                "Block %s failed, falling back to single reads: %s",
+                block.name,
+                err,
+            )
+            self.quarantine.record_failure(name, err)
+            return await self._async_read_fields(block.fields, data, previous)
+
+        try:
+            data.update(block.decode(regs))
+        except Exception as err:
+            _LOGGER.debug(
+                "Block %s decode failed: %s",
+                block.name,
+                err,
+            )
+            self.quarantine.record_failure(name, err)
+            for key, _ in block.fields:
+                data[key] = None
+            return
+
+        self.quarantine.record_success(name)
+
+    async def _async_read_split(self, block, data, previous):
+        # Wie _async_read_block: True bei Verbindungsverlust
+        fields = {}
+        for key, reg in block.fields:
+            if self.quarantine.is_quarantined(key):
+                data[key] = previous.get(key)
+            else:
+                fields[key] = reg
+
+        lost = False
+        for sub in build_read_plan((fields,), max_gap=0):
+            if lost:
+                # Übrige Teilblöcke nicht mehr versuchen
+                for key, _ in sub.fields:
+                    data[key] = None
+                continue
+            try:
+                regs = await self._client.read_holding_registers(
+                    sub.start,
+                    sub.count,
+                )
+                data.update(sub.decode(regs))
+            except ConnectionError as err:
+                _LOGGER.debug("Block %s skipped: %s", sub.name, err)
+                for key, _ in sub.fields:
+                    data[key] = None
+                lost = True
+            except Exception as err:
+                _LOGGER.debug("Block %s failed: %s", sub.name, err)
+                lost = await self._async_read_fields(
+                    sub.fields, data, previous
+                )
+        return lost
+
+    async def _async_read_fields(self, fields, data, previous):
+        # Wie _async_read_block: True bei Verbindungsverlust
+        lost = False
+        for key, reg in fields:
+            if lost:
+                data[key] = None
+                continue
+
+            if self.quarantine.is_quarantined(key):
+                # letzten bekannten Wert behalten
+                data[key] = previous.get(key)
+                continue
+
+            try:
+                value = await self._client.read_value(reg)
+                scale = reg.get("scale")
+                data[key] = value * scale if scale else value
+            except ConnectionError as err:
+                _LOGGER.debug("Register %s skipped: %s", key, err)
+                data[key] = None
+                lost = True
+                continue
+            except Exception as err:
+                _LOGGER.debug(
+                    "Register %s (%s) failed: %s",
+                    key,
+                    reg["addr"],
+                    err,
+                )
+                self.quarantine.record_failure(key, err)
+                data[key] = None
+                continue
+
+            self.quarantine.record_success(key)
+
+        return lost
@@ -0,0 +1,82 @@
+import struct
+
+# Feldarten im kompilierten Layout
+_PLAIN = 0
+_INT32 = 1
+_STRING = 2
+
+
+class BlockDecoder:
+    """Decodes all fields of a read block with one precompiled struct."""
+
+    def __init__(self, start, count, fields):
+        self.count = count
+
+        # Register kommen als Liste von uint16 (Big Endian auf dem Draht)
+        self._wire = struct.Struct(f">{count}H")
+
+        layout = [">"]
+        self._fields = []
+        pos = start
+
+        for key, reg in sorted(fields, key=lambda item: item[1]["addr"]):
+            addr = reg["addr"]
+            if addr < pos:
+                raise ValueError(f"Overlapping register definition: {key}")
+            if addr > pos:
+                layout.append(f"{(addr - pos) * 2}x")
+
+            rtype = reg["type"]
+            if rtype == "int32":
+                # E3/DC: niederwertiges Wort zuerst
+                layout.append("Hh")
+                kind = _INT32
+            elif rtype == "uint16":
+                layout.append("H")
+                kind = _PLAIN
+            elif rtype == "int16":
+                layout.append("h")
+                kind = _PLAIN
+            elif rtype == "string":
+                layout.append(f"{reg['len'] * 2}s")
+                kind = _STRING
+            else:
+                raise ValueError(f"Unsupported register type: {rtype}")
+
+            self._fields.append((key, kind, reg.get("scale")))
+            pos = addr + reg["len"]
+
+        if pos < start + count:
+            layout.append(f"{(start + count - pos) * 2}x")
+
+        self._layout = struct.Struct("".join(layout))
+
+    def decode(self, regs):
+        if len(regs) != self.count:
+            raise ValueError(
+                f"Expected {self.count} registers, got {len(regs)}"
+            )
+
+        values = self._layout.unpack(self._wire.pack(*regs))
+
+        data = {}
+        i = 0
+        for key, kind, scale in self._fields:
+            if kind == _INT32:
+                value = (values[i + 1] << 16) | values[i]
+                i += 2
+            elif kind == _STRING:
+                value = (
+                    values[i]
+                    .decode("ascii", errors="ignore")
+                    .strip("\x00 ")
+                    .strip()
+                )
+                i += 1
+            else:
+                value = values[i]
+                i += 1
+
+            data[key] = value * scale if scale else value
+
+        return data
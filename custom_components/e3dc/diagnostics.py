@@ -0,0 +1,34 @@
+from .const import DOMAIN, DATA_SCHEDULER
+
+
+async def async_get_config_entry_diagnostics(hass, entry):
+    data = hass.data[DOMAIN][entry.entry_id]
+    coordinator = data["coordinator"]
+    client = data["client"]
+
+    scheduler = hass.data.get(DATA_SCHEDULER)
+
+    return {
+        "options": dict(entry.options),
+        "register_map": coordinator.register_map.as_dict(),
+        "quarantine": coordinator.quarantine.as_dict(),
+        "transport": {
+            "state": client.connection_state,
+            "connection_id": client.connection_id,
+            "reconnects": client.reconnect_count,
+            **client.stats.as_dict(),
+        },
+        "polling": {
+            "effective_scan_interval": (
+                coordinator.scan_interval.total_seconds()
+            ),
+            "poll_lag": coordinator.poll_lag,
+            "fleet_active_polls": (
+                scheduler.active_polls if scheduler is not None else None
+            ),
+            "read_plans": {
+                group: [block.name for block in plan]
+                for group, plan in coordinator._read_plans.items()
+            },
+        },
+    }
@@ -0,0 +1,91 @@
+import asyncio
+import ipaddress
+import logging
+
+from .const import (
+    DEFAULT_PORT,
+    DEFAULT_UNIT_ID,
+    DISCOVERY_CONCURRENCY,
+    DISCOVERY_CONNECT_TIMEOUT,
+    DISCOVERY_MAX_HOSTS,
+    DISCOVERY_PROBE_TIMEOUT,
+    PROBE_OFFSETS,
+)
+from .probe import async_probe_magic, cache_probe_result
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def network_hosts(network):
+    """Return the host addresses of ``network`` (e.g. "192.168.1.0/24")."""
+    net = ipaddress.ip_network(network, strict=False)
+    if net.num_addresses > DISCOVERY_MAX_HOSTS:
+        raise ValueError(
+            f"Network {net} too large (max. {DISCOVERY_MAX_HOSTS} addresses)"
+        )
+    if net.num_addresses == 1:
+        return [str(net.network_address)]
+    return [str(host) for host in net.hosts()]
+
+
+async def async_scan_network(
+    network,
+    ports=(DEFAULT_PORT,),
+    unit_id=DEFAULT_UNIT_ID,
+    offsets=PROBE_OFFSETS,
+    concurrency=DISCOVERY_CONCURRENCY,
+    connect_timeout=DISCOVERY_CONNECT_TIMEOUT,
+    probe_timeout=DISCOVERY_PROBE_TIMEOUT,
+):
+    """Scan a subnet for E3/DC Modbus/TCP endpoints.
+
+    Every host/port pair is probed with async_probe_magic (short connect
+    timeout, all offsets pipelined over one connection), at most
+    ``concurrency`` at a time. Returns ``(host, port, result)`` for each
+    endpoint that answered with a known magic, ``result`` being the
+    probe's ``(mode, offset, regs)``, sorted by address and port.
+    """
+    hosts = network_hosts(network)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def scan(host, port):
+        async with semaphore:
+            try:
+                result = await async_probe_magic(
+                    host,
+                    port,
+                    unit_id,
+                    offsets=offsets,
+                    deadline=probe_timeout,
+                    connect_timeout=connect_timeout,
+                )
+            except (OSError, asyncio.TimeoutError):
+                # Kein Gerät oder Port geschlossen
+                return None
+        if result is None:
+            return None
+        return host, port, result
+
+    results = await asyncio.gather(
+        *(scan(host, port) for host in hosts for port in ports)
+    )
+    found = sorted(
+        (item for item in results if item is not None),
+        key=lambda item: (ipaddress.ip_address(item[0]), item[1]),
+    )
+    _LOGGER.debug(
+        "Scanned %s hosts on %s, found %s endpoint(s)",
+        len(hosts),
+        network,
+        len(found),
+    )
+    return found
+
+
+async def async_discover(hass, network, ports=(DEFAULT_PORT,)):
+    # Gefundene Geräte im Probe-Cache ablegen, damit der Config Flow
+    # sie beim Anlegen nicht erneut prüft
+    found = await async_scan_network(network, ports)
+    for host, port, result in found:
+        cache_probe_result(hass, host, port, DEFAULT_UNIT_ID, result)
+    return found
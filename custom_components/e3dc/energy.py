@@ -0,0 +1,115 @@
+import logging
+import time
+
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    ENERGY_MAX_GAP,
+    ENERGY_SAVE_DELAY,
+    ENERGY_STORE_VERSION,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Energiekanal -> (Leistungsregister, Umrechnung in positive Leistung)
+ENERGY_CHANNELS = {
+    "grid_import": ("grid_power", lambda v, data: max(v, 0)),
+    "grid_export": ("grid_power", lambda v, data: max(-v, 0)),
+    "battery_charge": ("battery_power", lambda v, data: max(v, 0)),
+    "battery_discharge": ("battery_power", lambda v, data: max(-v, 0)),
+    "solar_production": ("pv_power", lambda v, data: max(v, 0)),
+    "wallbox_energy": ("wallbox_power", lambda v, data: max(v, 0)),
+    "wallbox_solar_energy": (
+        "wallbox_solar_power",
+        lambda v, data: max(v, 0),
+    ),
+    "wallbox_grid_energy": (
+        "wallbox_power",
+        lambda v, data: max(
+            v - (data.get("wallbox_solar_power") or 0), 0
+        ),
+    ),
+}
+
+
+class EnergyEngine:
+    """Integrates all energy channels from the coordinator's samples.
+
+    Uses the trapezoidal rule between two device samples and does not
+    bridge gaps longer than ``max_gap`` seconds (failed polls, restarts).
+    Totals are persisted in one store per config entry.
+    """
+
+    def __init__(self, hass, entry_id, max_gap=ENERGY_MAX_GAP):
+        self._store = Store(
+            hass,
+            ENERGY_STORE_VERSION,
+            f"{DOMAIN}.energy.{entry_id}",
+        )
+        self._max_gap = max_gap
+
+        self.totals = {}
+        # Kanäle mit gespeichertem bzw. bereits übernommenem Zählerstand
+        self._stored_keys = set()
+        # Wanduhrzeit des letzten Samples (für Nachträge aus der Historie)
+        self.last_sample_time = None
+        self._last_time = None
+        self._last_power = {}
+
+    async def async_load(self):
+        stored = await self._store.async_load()
+        if stored:
+            self.totals.update(stored.get("totals", {}))
+            self._stored_keys.update(self.totals)
+            self.last_sample_time = stored.get("last_sample_time")
+
+    async def async_save(self):
+        await self._store.async_save(self._data_to_save())
+
+    def _data_to_save(self):
+        return {
+            "totals": self.totals,
+            "last_sample_time": self.last_sample_time,
+        }
+
+    def seed(self, key, value):
+        # Übernahme alter, von den Entities wiederhergestellter Zähler.
+        # Polls vor dem Anlegen der Entities haben evtl. schon integriert;
+        # diese Energie kommt zum alten Stand hinzu
+        if key in self._stored_keys:
+            return
+        self._stored_keys.add(key)
+        self.totals[key] = value + self.totals.get(key, 0.0)
+        self._store.async_delay_save(self._data_to_save, ENERGY_SAVE_DELAY)
+
+    def add_energy(self, key, value):
+        self.totals[key] = self.totals.get(key, 0.0) + value
+
+    def add_sample(self, data, timestamp):
+        power = {}
+        for key, (source_key, transform) in ENERGY_CHANNELS.items():
+            value = data.get(source_key)
+            power[key] = None if value is None else transform(value, data)
+
+        if self._last_time is not None:
+            seconds = timestamp - self._last_time
+
+            if 0 < seconds <= self._max_gap:
+                for key, value in power.items():
+                    last = self._last_power.get(key)
+                    if value is None or last is None:
+                        continue
+                    self.totals[key] = self.totals.get(key, 0.0) + (
+                        (last + value) / 2 * seconds / 3_600_000
+                    )
+            elif seconds > self._max_gap:
+                _LOGGER.debug(
+                    "Energy gap of %.0fs not bridged", seconds
+                )
+
+        self._last_time = timestamp
+        self._last_power = power
+        self.last_sample_time = time.time()
+
+        self._store.async_delay_save(self._data_to_save, ENERGY_SAVE_DELAY)
@@ -0,0 +1,136 @@
+import time
+
+from homeassistant.const import (
+    PERCENTAGE,
+    UnitOfElectricCurrent,
+    UnitOfElectricPotential,
+    UnitOfEnergy,
+    UnitOfPower,
+)
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import (
+    DEFAULT_DEADBANDS,
+    DEFAULT_MIN_WRITE_INTERVAL,
+    DEFAULT_MAX_WRITE_INTERVAL,
+)
+
+# Sensorfamilie je Einheit (Deadband-Regeln gelten pro Familie)
+UNIT_FAMILIES = {
+    UnitOfPower.WATT: "power",
+    UnitOfElectricPotential.VOLT: "voltage",
+    UnitOfElectricCurrent.AMPERE: "current",
+    PERCENTAGE: "percent",
+    UnitOfEnergy.KILO_WATT_HOUR: "energy",
+}
+
+
+class StateWriteFilter:
+    """Decides whether a new value is significant enough to be written."""
+
+    def __init__(
+        self,
+        deadband=0,
+        relative=0,
+        min_interval=0,
+        max_interval=None,
+    ):
+        self._deadband = deadband
+        self._relative = relative / 100
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+
+        self._last_value = None
+        self._last_available = None
+        self._last_write = None
+
+    def should_write(self, value, available, now):
+        if self._last_write is None or available != self._last_available:
+            return True
+
+        elapsed = now - self._last_write
+        if self._max_interval and elapsed >= self._max_interval:
+            return True
+
+        last = self._last_value
+        if value == last:
+            return False
+
+        # Zustandswechsel (an/aus, None) immer sofort schreiben
+        if (
+            value is None
+            or last is None
+            or isinstance(value, bool)
+            or not isinstance(value, (int, float))
+            or not isinstance(last, (int, float))
+        ):
+            return True
+
+        if elapsed < self._min_interval:
+            return False
+
+        threshold = max(self._deadband, abs(last) * self._relative)
+        return abs(value - last) > threshold
+
+    def written(self, value, available, now):
+        self._last_value = value
+        self._last_available = available
+        self._last_write = now
+
+
+def write_filter_for(entry, family):
+    options = entry.options
+
+    return StateWriteFilter(
+        deadband=options.get(
+            f"deadband_{family}",
+            DEFAULT_DEADBANDS.get(family, 0),
+        ),
+        relative=options.get("deadband_relative", 0),
+        min_interval=options.get(
+            "min_write_interval", DEFAULT_MIN_WRITE_INTERVAL
+        ),
+        max_interval=options.get(
+            "max_write_interval", DEFAULT_MAX_WRITE_INTERVAL
+        ),
+    )
+
+
+class E3DCEntity(CoordinatorEntity):
+    """Base entity with shared device info and throttled state writes."""
+
+    # coordinator.data-Schlüssel, von denen der Zustand abhängt
+    # (für gezielte Aktualisierungen, siehe async_refresh_keys)
+    _data_keys = ()
+
+    def __init__(self, coordinator, entry, family=None):
+        super().__init__(coordinator)
+
+        self._entry = entry
+        self._write_filter = write_filter_for(entry, family)
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        if self._data_keys:
+            self.async_on_remove(
+                self.coordinator.async_add_key_listener(
+                    self._data_keys,
+                    self._handle_coordinator_update,
+                )
+            )
+
+    @property
+    def device_info(self):
+        return self.coordinator.device_info
+
+    def _state_value(self):
+        raise NotImplementedError
+
+    def _handle_coordinator_update(self):
+        value = self._state_value()
+        available = self.available
+        now = time.monotonic()
+
+        if self._write_filter.should_write(value, available, now):
+            self._write_filter.written(value, available, now)
+            self.async_write_ha_state()
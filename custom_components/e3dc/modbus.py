@@ -1,91 +1,311 @@
 import asyncio
+import importlib
+import inspect
+import logging
 import struct
+import time
 
-from pymodbus.client import AsyncModbusTcpClient
-from pymodbus.exceptions import ModbusException
+from .const import (
+    DEFAULT_PIPELINE_DEPTH,
+    MODBUS_TIMEOUT,
+    RECONNECT_BACKOFF_MIN,
+    RECONNECT_BACKOFF_MAX,
+)
+from .stats import TransportStats
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_DISCONNECTED = "disconnected"
+STATE_CONNECTED = "connected"
+STATE_BACKOFF = "backoff"
+
+# Parametername der Geräteadresse, je nach pymodbus-Version
+_UNIT_KWARGS = ("device_id", "slave", "unit")
+
+
+class ModbusTimeout(ConnectionError):
+    """The device did not answer a transaction in time."""
+
+
+class ConnectionBackoff:
+    """Connection state and exponential reconnect backoff."""
+
+    def __init__(self):
+        self._connection_id = 0
+        self._failures = 0
+        self._retry_at = 0.0
+        self.state = STATE_DISCONNECTED
+
+    @property
+    def connection_id(self):
+        # Zählt jeden Verbindungsaufbau; ändert sich nach einem Reconnect
+        return self._connection_id
+
+    @property
+    def reconnect_count(self):
+        return max(self._connection_id - 1, 0)
+
+    def _check_backoff(self, now):
+        if now < self._retry_at:
+            raise ConnectionError(
+                f"Reconnect backoff active ({self._retry_at - now:.1f}s)"
+            )
+
+    def _connect_succeeded(self):
+        self._failures = 0
+        self._retry_at = 0.0
+        self._connection_id += 1
+        self.state = STATE_CONNECTED
+
+    def _schedule_retry(self, now):
+        delay = min(
+            RECONNECT_BACKOFF_MIN * 2 ** self._failures,
+            RECONNECT_BACKOFF_MAX,
+        )
+        self._failures += 1
+        self._retry_at = now + delay
+        self.state = STATE_BACKOFF
+        _LOGGER.debug("Connect failed, next attempt in %ss", delay)
+
+
+def import_pymodbus():
+    """Import the pymodbus modules used by E3DCConnection (blocking)."""
+    importlib.import_module("pymodbus.client")
+    importlib.import_module("pymodbus.exceptions")
+
+
+class E3DCConnection(ConnectionBackoff):
+    """Long-lived pymodbus connection with reconnect backoff."""
+
+    def __init__(self, host, port, unit_id):
+        # pymodbus erst hier importieren: teuer auf langsamen Hosts und
+        # im Pipelining-Modus gar nicht nötig
+        from pymodbus.client import AsyncModbusTcpClient
+        from pymodbus.exceptions import (
+            ConnectionException,
+            ModbusException,
+            ModbusIOException,
+        )
+
+        super().__init__()
+        self._unit_id = unit_id
+
+        # Fehler, nach denen die Verbindung neu aufgebaut werden muss
+        self.transport_errors = (
+            ConnectionException,
+            ModbusIOException,
+            asyncio.TimeoutError,
+            OSError,
+        )
+        # Fehler ohne Antwort des Geräts (werden zu ModbusTimeout)
+        self.timeout_errors = (asyncio.TimeoutError, ModbusIOException)
+        self.error_type = ModbusException
+
+        self._client = AsyncModbusTcpClient(
+            host=host,
+            port=port,
+            # Eigener Timeout pro Transaktion, keine internen
+            # Wiederholungen (sonst ~4x Timeout pro toter Anfrage)
+            timeout=MODBUS_TIMEOUT,
+            retries=0,
+            # Reconnects übernimmt diese Klasse
+            reconnect_delay=0,
+        )
+        self._unit_kwargs = {}
+
+    @property
+    def connected(self):
+        return bool(getattr(self._client, "connected", False))
+
+    def unit_kwargs(self, method):
+        # Signatur einmalig prüfen statt bei jedem Aufruf TypeError
+        # abzufangen
+        kwargs = self._unit_kwargs.get(method)
+        if kwargs is None:
+            params = inspect.signature(
+                getattr(self._client, method)
+            ).parameters
+            name = next((n for n in _UNIT_KWARGS if n in params), None)
+            if name is None and any(
+                p.kind == inspect.Parameter.VAR_KEYWORD
+                for p in params.values()
+            ):
+                name = "slave"
+            kwargs = {name: self._unit_id} if name else {}
+            self._unit_kwargs[method] = kwargs
+        return kwargs
+
+    async def async_get_client(self):
+        if self.connected:
+            return self._client
+
+        now = time.monotonic()
+        self._check_backoff(now)
+
+        try:
+            await self._client.connect()
+        except Exception as err:
+            self._schedule_retry(now)
+            raise ConnectionError(f"Connection failed: {err}") from err
+
+        if not self.connected:
+            self._schedule_retry(now)
+            raise ConnectionError("Connection failed")
+
+        self._connect_succeeded()
+        return self._client
+
+    async def async_call(self, method, **kwargs):
+        client = await self.async_get_client()
+        try:
+            return await getattr(client, method)(
+                **kwargs,
+                **self.unit_kwargs(method),
+            )
+        except self.transport_errors as err:
+            # Als ConnectionError melden, damit der Coordinator den Fehler
+            # der Verbindung anlastet und nicht dem gelesenen Block
+            await self.async_close()
+            if isinstance(err, self.timeout_errors):
+                raise ModbusTimeout(f"No response: {err}") from err
+            raise ConnectionError(f"Connection lost: {err}") from err
+
+    async def async_close(self):
+        if self.connected:
+            # pymodbus 3.x schließt synchron, ältere Versionen async
+            result = self._client.close()
+            if inspect.isawaitable(result):
+                await result
+        if self.state == STATE_CONNECTED:
+            self.state = STATE_DISCONNECTED
 
 
 class E3DCModbusClient:
-    def __init__(self, host, port=502, unit_id=1, register_offset=0):
+    # Alle Register verfügbar, schreibbar, keine Geräte-Historie
+    # (siehe rscp.py)
+    supported_keys = None
+    supports_history = False
+    supports_write = True
+    supports_sampling = True
+
+    def __init__(
+        self,
+        host,
+        port=502,
+        unit_id=1,
+        register_offset=0,
+        pipeline_depth=DEFAULT_PIPELINE_DEPTH,
+    ):
         self._host = host
         self._port = port
         self._unit_id = unit_id
         self._register_offset = register_offset
 
-        self._client = AsyncModbusTcpClient(
-            host=self._host,
-            port=self._port,
-        )
+        if pipeline_depth > 1:
+            from .pipeline import E3DCPipelineConnection
 
+            # Mehrere Transaktionen gleichzeitig, kein globaler Lock
+            self._pipeline = E3DCPipelineConnection(
+                host, port, unit_id, pipeline_depth
+            )
+            self._connection = self._pipeline
+        else:
+            self._pipeline = None
+            self._connection = E3DCConnection(host, port, unit_id)
         self._lock = asyncio.Lock()
+        self.stats = TransportStats()
+        # Optionaler Mitschnitt der Rohregister (capture.py)
+        self.recorder = None
+
+    @property
+    def connection_id(self):
+        return self._connection.connection_id
+
+    @property
+    def connection_state(self):
+        return self._connection.state
+
+    @property
+    def reconnect_count(self):
+        return self._connection.reconnect_count
 
     async def connect(self):
-        connected = getattr(self._client, "connected", False)
-        if not connected:
-            await self._client.connect()
+        if self._pipeline is not None:
+            await self._pipeline.async_connect()
+        else:
+            await self._connection.async_get_client()
 
     async def close(self):
-        connected = getattr(self._client, "connected", False)
-        if connected:
-            await self._client.close()
+        await self._connection.async_close()
 
     # --------------------------------------------------
     # Low-level access
     # --------------------------------------------------
 
     async def read_holding_registers(self, address: int, count: int):
-        async with self._lock:
-            await self.connect()
-            kwargs = {
-                "address": (address - 40001) + self._register_offset,
-                "count": count,
-            }
-            try:
-                result = await self._client.read_holding_registers(
-                    **kwargs,
-                    slave=self._unit_id,
+        start = time.monotonic()
+        try:
+            if self._pipeline is not None:
+                regs = await self._pipeline.read_holding_registers(
+                    (address - 40001) + self._register_offset,
+                    count,
+                )
+            else:
+                result = await self._async_locked_call(
+                    "read_holding_registers",
+                    address=(address - 40001) + self._register_offset,
+                    count=count,
                 )
-            except TypeError:
-                try:
-                    result = await self._client.read_holding_registers(
-                        **kwargs,
-                        unit=self._unit_id,
-                    )
-                except TypeError:
-                    result = await self._client.read_holding_registers(
-                        **kwargs
-                    )
-
-        if result.isError():
-            raise ModbusException(result)
-
-        return result.registers
+                if result.isError():
+                    raise self._connection.error_type(result)
+                regs = result.registers
+        except Exception as err:
+            self.stats.record_error(err, self._is_timeout(err))
+            raise
+
+        self.stats.record_transaction(
+            f"{address}+{count}",
+            time.monotonic() - start,
+            count,
+        )
+        if self.recorder is not None:
+            self.recorder.record(address, regs)
+        return regs
 
     async def write_register(self, address: int, value: int):
-        async with self._lock:
-            await self.connect()
-            kwargs = {
-                "address": (address - 40001) + self._register_offset,
-                "value": value,
-            }
-            try:
-                result = await self._client.write_register(
-                    **kwargs,
-                    slave=self._unit_id,
+        start = time.monotonic()
+        try:
+            if self._pipeline is not None:
+                await self._pipeline.write_register(
+                    (address - 40001) + self._register_offset,
+                    value,
+                )
+            else:
+                result = await self._async_locked_call(
+                    "write_register",
+                    address=(address - 40001) + self._register_offset,
+                    value=value,
                 )
-            except TypeError:
-                try:
-                    result = await self._client.write_register(
-                        **kwargs,
-                        unit=self._unit_id,
-                    )
-                except TypeError:
-                    result = await self._client.write_register(
-                        **kwargs
-                    )
-
-        if result.isError():
-            raise ModbusException(result)
+                if result.isError():
+                    raise self._connection.error_type(result)
+        except Exception as err:
+            self.stats.record_error(err, self._is_timeout(err))
+            raise
+
+        self.stats.record_transaction(
+            f"write {address}",
+            time.monotonic() - start,
+        )
+
+    @staticmethod
+    def _is_timeout(err):
+        return isinstance(err, (ModbusTimeout, asyncio.TimeoutError))
+
+    async def _async_locked_call(self, method, **kwargs):
+        start = time.monotonic()
+        async with self._lock:
+            self.stats.record_lock_wait(time.monotonic() - start)
+            return await self._connection.async_call(method, **kwargs)
 
     # --------------------------------------------------
     # Decoding helpers
@@ -117,24 +337,28 @@ class E3DCModbusClient:
     # High-level helper
     # --------------------------------------------------
 
-    async def read_value(self, regdef: dict):
-        regs = await self.read_holding_registers(
-            regdef["addr"],
-            regdef["len"],
-        )
-
+    @classmethod
+    def decode_value(cls, regdef: dict, regs):
         rtype = regdef["type"]
 
         if rtype == "int32":
-            return self.decode_int32(regs)
+            return cls.decode_int32(regs)
 
         if rtype == "uint16":
-            return self.decode_uint16(regs)
+            return cls.decode_uint16(regs)
 
         if rtype == "int16":
-            return self.decode_int16(regs)
+            return cls.decode_int16(regs)
 
         if rtype == "string":
-            return self.decode_string(regs)
+            return cls.decode_string(regs)
 
         raise ValueError(f"Unsupported register type: {rtype}")
+
+    async def read_value(self, regdef: dict):
+        regs = await self.read_holding_registers(
+            regdef["addr"],
+            regdef["len"],
+        )
+
+        return self.decode_value(regdef, regs)
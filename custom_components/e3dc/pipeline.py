@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import struct
+import time
+
+from .const import MODBUS_TIMEOUT
+from .modbus import (
+    ConnectionBackoff,
+    ModbusTimeout,
+    STATE_CONNECTED,
+    STATE_DISCONNECTED,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# MBAP Header: Transaction ID, Protocol ID, Länge, Unit ID
+_MBAP = struct.Struct(">HHHB")
+# Funktionscode + zwei Wörter (Read Holding Registers, Write Register)
+_REQUEST = struct.Struct(">BHH")
+
+
+class ModbusExceptionResponse(Exception):
+    """The device answered with a Modbus exception code."""
+
+    def __init__(self, function, code):
+        super().__init__(
+            f"Modbus exception {code} (function {function & 0x7F})"
+        )
+        self.code = code
+
+
+class E3DCPipelineConnection(ConnectionBackoff):
+    """Modbus/TCP connection with several transactions in flight.
+
+    Requests are tagged with their MBAP transaction ID and matched to the
+    responses by a single reader task, so up to ``depth`` requests can
+    share one socket without waiting for each other.
+    """
+
+    def __init__(self, host, port, unit_id, depth, timeout=MODBUS_TIMEOUT):
+        super().__init__()
+        self._host = host
+        self._port = port
+        self._unit_id = unit_id
+        self._timeout = timeout
+
+        self._slots = asyncio.Semaphore(depth)
+        self._connect_lock = asyncio.Lock()
+        self._reader = None
+        self._writer = None
+        self._reader_task = None
+        self._pending = {}
+        self._next_tid = 0
+        # Zeitpunkt der letzten Antwort (bzw. des Verbindungsaufbaus)
+        self._last_response = 0.0
+
+    @property
+    def connected(self):
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def async_connect(self):
+        if self.connected:
+            return
+
+        async with self._connect_lock:
+            if self.connected:
+                return
+
+            now = time.monotonic()
+            self._check_backoff(now)
+
+            try:
+                self._reader, self._writer = await asyncio.wait_for(
+                    asyncio.open_connection(self._host, self._port),
+                    self._timeout,
+                )
+            except (OSError, asyncio.TimeoutError) as err:
+                self._schedule_retry(now)
+                raise ConnectionError(f"Connection failed: {err}") from err
+
+            self._reader_task = asyncio.create_task(self._async_read_loop())
+            self._last_response = time.monotonic()
+            self._connect_succeeded()
+
+    async def async_close(self):
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.close()
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        self._fail_pending(ConnectionError("Connection closed"))
+        if self.state == STATE_CONNECTED:
+            self.state = STATE_DISCONNECTED
+
+    def _fail_pending(self, err):
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(err)
+
+    async def _async_read_loop(self):
+        reader = self._reader
+        try:
+            while True:
+                header = await reader.readexactly(_MBAP.size)
+                tid, _, length, _ = _MBAP.unpack(header)
+                pdu = await reader.readexactly(length - 1)
+                self._last_response = time.monotonic()
+
+                future = self._pending.pop(tid, None)
+                if future is None or future.done():
+                    # Antwort auf eine bereits abgelaufene Anfrage
+                    continue
+                future.set_result(pdu)
+        except Exception as err:
+            # Auch ungültige Frames (z. B. MBAP-Länge 0): ohne Leser
+            # liefen sonst alle weiteren Anfragen in den Timeout
+            _LOGGER.debug("Pipeline connection lost: %s", err)
+            self._reader_task = None
+            await self.async_close()
+
+    async def async_request(self, pdu):
+        async with self._slots:
+            await self.async_connect()
+
+            self._next_tid = (self._next_tid + 1) & 0xFFFF
+            tid = self._next_tid
+            future = asyncio.get_running_loop().create_future()
+            self._pending[tid] = future
+
+            self._writer.write(
+                _MBAP.pack(tid, 0, len(pdu) + 1, self._unit_id) + pdu
+            )
+            try:
+                response = await asyncio.wait_for(future, self._timeout)
+            except asyncio.TimeoutError as err:
+                # Kam eine volle Timeout-Dauer gar keine Antwort, ist die
+                # Verbindung tot (z. B. halb offen nach Neustart des
+                # Geräts): schließen und neu aufbauen. Sonst offen lassen,
+                # andere Anfragen sind noch unterwegs und eine späte
+                # Antwort wird verworfen
+                if time.monotonic() - self._last_response >= self._timeout:
+                    await self.async_close()
+                raise ModbusTimeout(
+                    f"No response to transaction {tid}"
+                ) from err
+            finally:
+                self._pending.pop(tid, None)
+
+        if response[0] & 0x80:
+            raise ModbusExceptionResponse(response[0], response[1])
+        return response
+
+    async def read_holding_registers(self, address, count):
+        response = await self.async_request(
+            _REQUEST.pack(0x03, address, count)
+        )
+        byte_count = response[1]
+        if byte_count != count * 2:
+            raise ValueError(
+                f"Expected {count * 2} bytes, got {byte_count}"
+            )
+        return list(struct.unpack_from(f">{count}H", response, 2))
+
+    async def write_register(self, address, value):
+        await self.async_request(_REQUEST.pack(0x06, address, value))
@@ -0,0 +1,73 @@
+from .const import DEFAULT_MAX_READ_GAP, MAX_READ_REGISTERS
+from .decoder import BlockDecoder
+
+
+class ReadBlock:
+    """Contiguous register range covering one or more register definitions."""
+
+    def __init__(self, start, fields):
+        self.start = start
+        self.fields = fields
+        self.count = max(
+            reg["addr"] + reg["len"] for _, reg in fields
+        ) - start
+        self._decoder = BlockDecoder(start, self.count, fields)
+
+    @property
+    def name(self):
+        return f"{self.start}+{self.count}"
+
+    def __repr__(self):
+        return (
+            f"ReadBlock(start={self.start}, count={self.count}, "
+            f"fields={len(self.fields)})"
+        )
+
+    def decode(self, regs):
+        return self._decoder.decode(regs)
+
+
+def build_read_plan(
+    tables,
+    max_gap=DEFAULT_MAX_READ_GAP,
+    max_count=MAX_READ_REGISTERS,
+):
+    # Alle Registerdefinitionen nach Adresse sortieren und zu
+    # zusammenhängenden Blöcken zusammenfassen. Lücken bis max_gap
+    # Register werden mitgelesen, wenn das eine Transaktion spart.
+    fields = sorted(
+        (
+            (key, reg)
+            for table in tables
+            for key, reg in table.items()
+        ),
+        key=lambda item: item[1]["addr"],
+    )
+
+    blocks = []
+    current = []
+    start = end = None
+
+    for key, reg in fields:
+        addr = reg["addr"]
+        reg_end = addr + reg["len"]
+
+        if current and (
+            addr - end > max_gap
+            or max(end, reg_end) - start > max_count
+        ):
+            blocks.append(ReadBlock(start, current))
+            current = []
+
+        if not current:
+            start = addr
+            end = reg_end
+        else:
+            end = max(end, reg_end)
+
+        current.append((key, reg))
+
+    if current:
+        blocks.append(ReadBlock(start, current))
+
+    return blocks
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import time
+
+from .const import (
+    DATA_PROBE_CACHE,
+    MODE_SIMPLE,
+    MODE_SUNSPEC,
+    PROBE_CACHE_TTL,
+    PROBE_DEADLINE,
+    PROBE_OFFSETS,
+)
+from .modbus import E3DCModbusClient
+
+_LOGGER = logging.getLogger(__name__)
+
+E3DC_MAGIC = 0xE3DC
+SUNSPEC_MAGIC = (0x5375, 0x6E53)
+
+
+def _mode_of(regs):
+    if regs[0] == E3DC_MAGIC:
+        return MODE_SIMPLE
+    if tuple(regs[:2]) == SUNSPEC_MAGIC:
+        return MODE_SUNSPEC
+    return None
+
+
+async def async_probe_magic(
+    host,
+    port,
+    unit_id,
+    offsets=PROBE_OFFSETS,
+    deadline=PROBE_DEADLINE,
+    connect_timeout=None,
+):
+    """Detect mode and register offset over one shared connection.
+
+    All offsets are probed concurrently (pipelined) with one 2-register
+    read each, which covers both the E3/DC and the SunSpec magic. Returns
+    ``(mode, offset, regs)`` for the first offset in preference order
+    that answered with a known magic, or None.
+    """
+    if connect_timeout is None:
+        connect_timeout = deadline
+
+    client = E3DCModbusClient(
+        host=host,
+        port=port,
+        unit_id=unit_id,
+        pipeline_depth=len(offsets),
+    )
+
+    async def probe(offset):
+        return await client.read_holding_registers(40001 + offset, 2)
+
+    loop = asyncio.get_running_loop()
+    end = loop.time() + deadline
+    tasks = {}
+    try:
+        # Verbindungsfehler sofort melden statt alle Offsets zu versuchen
+        await asyncio.wait_for(client.connect(), connect_timeout)
+
+        for offset in offsets:
+            tasks[offset] = asyncio.ensure_future(probe(offset))
+        pending = set(tasks.values())
+        while pending:
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=max(end - loop.time(), 0),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                break
+
+            # Ergebnis nur übernehmen, wenn alle bevorzugten Offsets
+            # bereits fertig sind
+            for offset, task in tasks.items():
+                if not task.done():
+                    break
+                if task.cancelled() or task.exception() is not None:
+                    continue
+                regs = task.result()
+                mode = _mode_of(regs)
+                if mode is not None:
+                    return mode, offset, regs
+
+        for offset, task in tasks.items():
+            if task.done() and not task.cancelled() and task.exception():
+                _LOGGER.debug(
+                    "Magic check failed (offset %s): %s",
+                    offset,
+                    task.exception(),
+                )
+        return None
+    finally:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        await client.close()
+
+
+async def async_probe_cached(hass, host, port, unit_id):
+    # Ergebnisse pro Gerät merken: wiederholte Flows (Tippfehler in
+    # anderen Feldern, Zeroconf + manuell) prüfen nicht erneut
+    cache = hass.data.setdefault(DATA_PROBE_CACHE, {})
+    key = (host, port, unit_id)
+    now = time.monotonic()
+
+    cached = cache.get(key)
+    if cached is not None and now - cached[0] < PROBE_CACHE_TTL:
+        return cached[1]
+
+    result = await async_probe_magic(host, port, unit_id)
+    if result is not None:
+        cache_probe_result(hass, host, port, unit_id, result)
+    return result
+
+
+def cache_probe_result(hass, host, port, unit_id, result):
+    # Auch von der Netzwerksuche (discovery.py) befüllt
+    cache = hass.data.setdefault(DATA_PROBE_CACHE, {})
+    cache[(host, port, unit_id)] = (time.monotonic(), result)
@@ -0,0 +1,74 @@
+import time
+
+from .const import (
+    QUARANTINE_THRESHOLD,
+    QUARANTINE_BACKOFF_MIN,
+    QUARANTINE_BACKOFF_MAX,
+)
+
+
+class RegisterQuarantine:
+    """Backs off registers or blocks that fail repeatedly.
+
+    Only device-side failures count (exception responses, undecodable
+    data); lost connections and timeouts are not recorded here.
+    """
+
+    def __init__(
+        self,
+        threshold=QUARANTINE_THRESHOLD,
+        backoff_min=QUARANTINE_BACKOFF_MIN,
+        backoff_max=QUARANTINE_BACKOFF_MAX,
+    ):
+        self._threshold = threshold
+        self._backoff_min = backoff_min
+        self._backoff_max = backoff_max
+        self._entries = {}
+
+    def is_quarantined(self, name, now=None):
+        entry = self._entries.get(name)
+        if entry is None or entry["retry_at"] is None:
+            return False
+        if now is None:
+            now = time.monotonic()
+        return now < entry["retry_at"]
+
+    def record_failure(self, name, err, now=None):
+        if now is None:
+            now = time.monotonic()
+
+        entry = self._entries.setdefault(
+            name,
+            {"failures": 0, "retry_at": None, "last_error": None},
+        )
+        entry["failures"] += 1
+        entry["last_error"] = str(err)
+
+        # Erst ab der Schwelle sperren, danach exponentiell länger
+        excess = entry["failures"] - self._threshold
+        if excess >= 0:
+            entry["retry_at"] = now + min(
+                self._backoff_min * 2 ** excess,
+                self._backoff_max,
+            )
+
+    def record_success(self, name):
+        self._entries.pop(name, None)
+
+    def as_dict(self, now=None):
+        if now is None:
+            now = time.monotonic()
+
+        return {
+            name: {
+                "failures": entry["failures"],
+                "quarantined": self.is_quarantined(name, now),
+                "retry_in": (
+                    max(round(entry["retry_at"] - now, 1), 0)
+                    if entry["retry_at"] is not None
+                    else None
+                ),
+                "last_error": entry["last_error"],
+            }
+            for name, entry in self._entries.items()
+        }
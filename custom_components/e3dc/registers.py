@@ -0,0 +1,209 @@
+import json
+import logging
+import os
+import re
+
+from .const import (
+    DATA_REGISTER_MAPS,
+    DEFAULT_GROUP_INTERVALS,
+    DEFAULT_REGISTER_MAP,
+    MAX_READ_REGISTERS,
+    REGISTER_MAP_VERSION,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+MAPS_DIR = os.path.join(os.path.dirname(__file__), "maps")
+
+# Registeranzahl je Typ (Strings: beliebig)
+_TYPE_LENGTHS = {"int32": 2, "uint16": 1, "int16": 1, "string": None}
+
+_SENSOR_FIELDS = {
+    "name",
+    "unit",
+    "device_class",
+    "entity_category",
+    "enabled_default",
+}
+
+_PROFILE_RE = re.compile(r"^[a-z0-9_]+$")
+
+
+class RegisterMapError(Exception):
+    """Invalid or unknown register map."""
+
+
+class RegisterMap:
+    """Compiled register map of one firmware/model profile.
+
+    ``groups`` holds the plain register definitions (addr/len/type/scale)
+    per poll group as consumed by planner.py, ``sensors`` the entity
+    metadata per data key (registers and derived values).
+    """
+
+    def __init__(self, profile, name, version, registers, sensors):
+        self.profile = profile
+        self.name = name
+        self.version = version
+
+        # Nach Adresse sortiert, damit Pläne und Diagnose stabil sind
+        ordered = sorted(registers.items(), key=lambda item: item[1]["addr"])
+        self.fields = {}
+        self.groups = {}
+        for key, reg in ordered:
+            regdef = {
+                field: reg[field]
+                for field in ("addr", "len", "type", "scale")
+                if field in reg
+            }
+            self.fields[key] = regdef
+            self.groups.setdefault(reg["group"], {})[key] = regdef
+
+        self.sensors = sensors
+
+    def __repr__(self):
+        return (
+            f"RegisterMap({self.profile!r}, registers={len(self.fields)}, "
+            f"sensors={len(self.sensors)})"
+        )
+
+    def as_dict(self):
+        return {
+            "profile": self.profile,
+            "name": self.name,
+            "version": self.version,
+            "groups": {
+                group: sorted(fields) for group, fields in self.groups.items()
+            },
+        }
+
+
+def available_register_maps():
+    """Return {profile: display name} of the bundled maps (blocking)."""
+    maps = {}
+    for filename in sorted(os.listdir(MAPS_DIR)):
+        profile, ext = os.path.splitext(filename)
+        if ext != ".json":
+            continue
+        try:
+            maps[profile] = _read_map(profile).get("name", profile)
+        except RegisterMapError as err:
+            _LOGGER.warning("Skipping register map %s: %s", filename, err)
+    return maps
+
+
+def _read_map(profile):
+    if not _PROFILE_RE.match(profile):
+        raise RegisterMapError(f"Invalid register map name: {profile}")
+
+    path = os.path.join(MAPS_DIR, f"{profile}.json")
+    try:
+        with open(path, encoding="utf-8") as file:
+            raw = json.load(file)
+    except FileNotFoundError as err:
+        raise RegisterMapError(f"Unknown register map: {profile}") from err
+    except ValueError as err:
+        raise RegisterMapError(f"{profile}: {err}") from err
+
+    if raw.get("version") != REGISTER_MAP_VERSION:
+        raise RegisterMapError(
+            f"{profile}: unsupported map version {raw.get('version')}"
+        )
+    return raw
+
+
+def _check_register(profile, key, reg):
+    rtype = reg.get("type")
+    if rtype not in _TYPE_LENGTHS:
+        raise RegisterMapError(f"{profile}/{key}: unsupported type {rtype}")
+
+    length = _TYPE_LENGTHS[rtype]
+    if not isinstance(reg.get("addr"), int) or not isinstance(
+        reg.get("len"), int
+    ):
+        raise RegisterMapError(f"{profile}/{key}: addr and len required")
+    if (length is not None and reg["len"] != length) or not (
+        0 < reg["len"] <= MAX_READ_REGISTERS
+    ):
+        raise RegisterMapError(f"{profile}/{key}: invalid len {reg['len']}")
+
+    if reg.get("group") not in DEFAULT_GROUP_INTERVALS:
+        raise RegisterMapError(
+            f"{profile}/{key}: unknown group {reg.get('group')}"
+        )
+
+    sensor = reg.get("sensor")
+    if sensor is not None:
+        _check_sensor(profile, key, sensor)
+
+
+def _check_sensor(profile, key, sensor):
+    unknown = set(sensor) - _SENSOR_FIELDS
+    if unknown or "name" not in sensor:
+        raise RegisterMapError(
+            f"{profile}/{key}: invalid sensor fields {sorted(unknown)}"
+        )
+
+
+def load_register_map(profile=DEFAULT_REGISTER_MAP):
+    """Read, merge (``extends``) and compile a register map (blocking)."""
+    chain = []
+    seen = set()
+    while profile is not None:
+        if profile in seen:
+            raise RegisterMapError(f"Circular register map: {profile}")
+        seen.add(profile)
+        raw = _read_map(profile)
+        chain.append((profile, raw))
+        profile = raw.get("extends")
+
+    # Basisprofil zuerst, Ableitungen ergänzen bzw. überschreiben Register
+    registers = {}
+    sensors = {}
+    for profile, raw in reversed(chain):
+        for key, reg in raw.get("registers", {}).items():
+            _check_register(profile, key, reg)
+            registers[key] = reg
+        for key, sensor in raw.get("sensors", {}).items():
+            _check_sensor(profile, key, sensor)
+            sensors[key] = sensor
+
+    # Überlappende Register würden den Blockdecoder aushebeln
+    end = None
+    last = None
+    for key, reg in sorted(registers.items(), key=lambda i: i[1]["addr"]):
+        if end is not None and reg["addr"] < end:
+            raise RegisterMapError(f"{chain[0][0]}: {key} overlaps {last}")
+        end = reg["addr"] + reg["len"]
+        last = key
+
+    sensors = {
+        **{
+            key: reg["sensor"]
+            for key, reg in registers.items()
+            if "sensor" in reg
+        },
+        **sensors,
+    }
+
+    profile, raw = chain[0]
+    return RegisterMap(
+        profile,
+        raw.get("name", profile),
+        raw["version"],
+        registers,
+        sensors,
+    )
+
+
+async def async_get_register_map(hass, profile=DEFAULT_REGISTER_MAP):
+    # Einmal pro Profil im Executor laden und kompilieren; alle
+    # Einträge mit demselben Profil teilen sich die Map
+    cache = hass.data.setdefault(DATA_REGISTER_MAPS, {})
+    register_map = cache.get(profile)
+    if register_map is None:
+        register_map = await hass.async_add_executor_job(
+            load_register_map, profile
+        )
+        cache[profile] = register_map
+    return register_map
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import time
+from array import array
+
+from .const import (
+    DEFAULT_SAMPLE_INTERVAL,
+    SAMPLE_BUFFER_SIZE,
+    SAMPLE_PERCENTILE,
+    SAMPLE_CHANNELS,
+)
+from .planner import build_read_plan
+from .registers import load_register_map
+
+_LOGGER = logging.getLogger(__name__)
+
+AGGREGATES = ("min", "max", "mean", f"p{SAMPLE_PERCENTILE}")
+
+
+class SampleRing:
+    """Fixed-size ring buffer of float samples for one channel."""
+
+    def __init__(self, size):
+        self._values = array("d", bytes(8 * size))
+        self._size = size
+        self.written = 0
+
+    def append(self, value):
+        self._values[self.written % self._size] = value
+        self.written += 1
+
+    def since(self, mark):
+        # Alle seit ``mark`` geschriebenen Werte, die noch im Puffer sind
+        count = min(self.written - mark, self._size)
+        start = (self.written - count) % self._size
+        end = start + count
+        if end <= self._size:
+            return self._values[start:end]
+        return self._values[start:] + self._values[:end - self._size]
+
+
+class HighRateSampler:
+    """Samples only the power block at a sub-second rate.
+
+    Samples stay in per-channel ring buffers; ``aggregates()`` returns
+    min/max/mean/percentile per channel over the samples since its last
+    call, so only the aggregates reach the state machine.
+    """
+
+    def __init__(
+        self,
+        hass,
+        client,
+        interval=DEFAULT_SAMPLE_INTERVAL,
+        size=SAMPLE_BUFFER_SIZE,
+        register_map=None,
+    ):
+        self._hass = hass
+        self._client = client
+        self._interval = interval
+
+        if register_map is None:
+            register_map = load_register_map()
+        # Nur Kanäle, die die Register-Map des Geräts kennt
+        fields = {
+            key: register_map.fields[key]
+            for key in SAMPLE_CHANNELS
+            if key in register_map.fields
+        }
+        self._plan = build_read_plan((fields,), max_gap=0)
+        self._rings = {key: SampleRing(size) for key in fields}
+        self._marks = dict.fromkeys(fields, 0)
+        self._task = None
+
+    def async_start(self):
+        if self._task is None:
+            self._task = self._hass.async_create_background_task(
+                self._async_run(), "e3dc high-rate sampler"
+            )
+
+    async def async_stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _async_run(self):
+        next_run = time.monotonic()
+        while True:
+            try:
+                await self._async_sample()
+            except Exception as err:
+                _LOGGER.debug("High-rate sample failed: %s", err)
+
+            # Festes Raster; bei Verzug ausgefallene Takte auslassen
+            next_run += self._interval
+            now = time.monotonic()
+            if next_run < now:
+                next_run = now
+            await asyncio.sleep(next_run - now)
+
+    async def _async_sample(self):
+        values = {}
+        for block in self._plan:
+            regs = await self._client.read_holding_registers(
+                block.start, block.count
+            )
+            values.update(block.decode(regs))
+
+        for key, ring in self._rings.items():
+            value = values.get(key)
+            if value is not None:
+                ring.append(value)
+
+    def aggregates(self):
+        result = {}
+        for key, ring in self._rings.items():
+            samples = ring.since(self._marks[key])
+            self._marks[key] = ring.written
+
+            if not samples:
+                for name in AGGREGATES:
+                    result[f"{key}_{name}"] = None
+                continue
+
+            ordered = sorted(samples)
+            index = round(SAMPLE_PERCENTILE / 100 * (len(ordered) - 1))
+            result[f"{key}_min"] = ordered[0]
+            result[f"{key}_max"] = ordered[-1]
+            result[f"{key}_mean"] = round(sum(ordered) / len(ordered), 1)
+            result[f"{key}_p{SAMPLE_PERCENTILE}"] = ordered[index]
+        return result
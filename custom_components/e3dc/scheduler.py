@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import math
+import time
+
+from .const import DATA_SCHEDULER, FLEET_MAX_CONCURRENT
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _Member:
+    def __init__(self, coordinator):
+        self.coordinator = coordinator
+        self.phase = 0.0
+        self.handle = None
+        self.polling = False
+
+
+class FleetScheduler:
+    """Staggers the refreshes of all E3/DC coordinators.
+
+    Every coordinator gets a fixed phase within its scan interval
+    (evenly spread over all registered entries), and at most
+    ``max_concurrent`` polls run at the same time. The delay between the
+    planned and the actual start of a poll is stored as
+    ``coordinator.poll_lag``.
+    """
+
+    def __init__(self, hass, max_concurrent=FLEET_MAX_CONCURRENT):
+        self._hass = hass
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._members = {}
+
+    @property
+    def active_polls(self):
+        return sum(member.polling for member in self._members.values())
+
+    def async_register(self, entry_id, coordinator):
+        self._members[entry_id] = _Member(coordinator)
+        self._async_rebalance()
+
+    def async_unregister(self, entry_id):
+        member = self._members.pop(entry_id, None)
+        if member is not None and member.handle is not None:
+            member.handle.cancel()
+        self._async_rebalance()
+
+    def _async_rebalance(self):
+        count = len(self._members)
+        for index, member in enumerate(self._members.values()):
+            member.phase = index / count
+            if not member.polling:
+                self._async_schedule(member)
+
+    def _async_schedule(self, member, after=None):
+        if member.handle is not None:
+            member.handle.cancel()
+
+        interval = member.coordinator.scan_interval.total_seconds()
+        offset = member.phase * interval
+        now = time.time()
+        if after is None:
+            after = now
+
+        # Nächster Zeitpunkt auf dem Raster offset + k * interval
+        steps = math.floor((after - offset) / interval) + 1
+        due = offset + steps * interval
+
+        member.handle = self._hass.loop.call_later(
+            max(due - now, 0),
+            self._async_start,
+            member,
+            due,
+        )
+
+    def _async_start(self, member, due):
+        member.handle = None
+        self._hass.async_create_background_task(
+            self._async_poll(member, due),
+            f"e3dc fleet poll {member.coordinator.name}",
+        )
+
+    async def _async_poll(self, member, due):
+        member.polling = True
+        try:
+            async with self._slots:
+                member.coordinator.poll_lag = max(time.time() - due, 0.0)
+                await member.coordinator.async_refresh()
+        except Exception:
+            _LOGGER.exception("Scheduled poll failed")
+        finally:
+            member.polling = False
+
+        if member in self._members.values():
+            # Überlange Polls: verpasste Rasterpunkte auslassen
+            self._async_schedule(member, after=max(due, time.time()))
+
+
+def async_get_scheduler(hass):
+    scheduler = hass.data.get(DATA_SCHEDULER)
+    if scheduler is None:
+        scheduler = hass.data[DATA_SCHEDULER] = FleetScheduler(hass)
+    return scheduler
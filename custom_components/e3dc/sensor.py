@@ -7,55 +7,94 @@ from homeassistant.components.sensor import (
 from homeassistant.const import (
     UnitOfEnergy,
     UnitOfPower,
-    UnitOfElectricPotential,
-    UnitOfElectricCurrent,
-    PERCENTAGE,
+    UnitOfInformation,
+    UnitOfTime,
+    EntityCategory,
 )
-from homeassistant.helpers.entity import DeviceInfo
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.util import dt as dt_util
 
 from .const import (
     DOMAIN,
-    REGISTERS,
-    DC_STRINGS,
-    POWER_METER_TYPE_1,
+    SAMPLE_CHANNELS,
+    ENERGY_STATISTICS_WRITE_INTERVAL,
 )
+from .entity import E3DCEntity, StateWriteFilter, UNIT_FAMILIES
+from .sampler import AGGREGATES
 
 
-BASE_SENSORS = {
-    "pv_power": ("PV Leistung", UnitOfPower.WATT, SensorDeviceClass.POWER),
-    "battery_power": ("Batterie Leistung", UnitOfPower.WATT, SensorDeviceClass.POWER),
-    "house_power": ("Hausverbrauch", UnitOfPower.WATT, SensorDeviceClass.POWER),
-    "grid_power": ("Netzleistung", UnitOfPower.WATT, SensorDeviceClass.POWER),
-    "additional_feedin_power": ("Zusatz Einspeiser", UnitOfPower.WATT, SensorDeviceClass.POWER),
-    "battery_soc": ("Batterie SOC", PERCENTAGE, SensorDeviceClass.BATTERY),
-    "autarky": ("Autarkie", PERCENTAGE, None),
-    "self_consumption": ("Eigenverbrauch", PERCENTAGE, None),
-    "wallbox_solar_power": ("Wallbox Solarleistung", UnitOfPower.WATT, SensorDeviceClass.POWER),
-    "sg_ready_status": ("SG Ready Status", None, None),
+ENERGY_SENSORS = {
+    "grid_import": "Netzbezug Energie",
+    "grid_export": "Netzeinspeisung Energie",
+    "battery_charge": "Batterie Laden Energie",
+    "battery_discharge": "Batterie Entladen Energie",
+    "solar_production": "PV Energie",
+    "wallbox_energy": "Wallbox Energie",
+    "wallbox_solar_energy": "Wallbox Solar Energie",
+    "wallbox_grid_energy": "Wallbox Netz Energie",
+}
+DIAGNOSTIC_SENSORS = {
+    "effective_scan_interval": (
+        "Effektives Abfrageintervall",
+        UnitOfTime.SECONDS,
+        SensorDeviceClass.DURATION,
+    ),
+    "poll_lag": (
+        "Abfrageverzögerung",
+        UnitOfTime.SECONDS,
+        SensorDeviceClass.DURATION,
+    ),
 }
 
-ENERGY_SENSORS = {
-    "grid_import": ("Netzbezug Energie", "grid_power", lambda v, data: max(v, 0)),
-    "grid_export": ("Netzeinspeisung Energie", "grid_power", lambda v, data: max(-v, 0)),
-    "battery_charge": ("Batterie Laden Energie", "battery_power", lambda v, data: max(v, 0)),
-    "battery_discharge": ("Batterie Entladen Energie", "battery_power", lambda v, data: max(-v, 0)),
-    "solar_production": ("PV Energie", "pv_power", lambda v, data: max(v, 0)),
-    "wallbox_energy": ("Wallbox Energie", "wallbox_power", lambda v, data: max(v, 0)),
-    "wallbox_solar_energy": ("Wallbox Solar Energie", "wallbox_solar_power", lambda v, data: max(v, 0)),
-    "wallbox_grid_energy": (
-        "Wallbox Netz Energie",
-        "wallbox_power",
-        lambda v, data: max(
-            v - (data.get("wallbox_solar_power") or 0), 0
-        ),
+# Poll-/Transport-Statistik (stats.py), standardmäßig deaktiviert
+POLL_STATS_SENSORS = {
+    "poll_duration": (
+        "Abfragedauer",
+        UnitOfTime.SECONDS,
+        SensorDeviceClass.DURATION,
+        SensorStateClass.MEASUREMENT,
+    ),
+    "poll_transactions": (
+        "Modbus Transaktionen pro Abfrage",
+        None,
+        None,
+        SensorStateClass.MEASUREMENT,
+    ),
+    "poll_bytes_read": (
+        "Gelesene Bytes pro Abfrage",
+        UnitOfInformation.BYTES,
+        SensorDeviceClass.DATA_SIZE,
+        SensorStateClass.MEASUREMENT,
+    ),
+    "poll_lock_wait": (
+        "Wartezeit Modbus-Lock",
+        UnitOfTime.SECONDS,
+        SensorDeviceClass.DURATION,
+        SensorStateClass.MEASUREMENT,
+    ),
+    "modbus_errors": (
+        "Modbus Fehler",
+        None,
+        None,
+        SensorStateClass.TOTAL_INCREASING,
+    ),
+    "modbus_timeouts": (
+        "Modbus Timeouts",
+        None,
+        None,
+        SensorStateClass.TOTAL_INCREASING,
+    ),
+    "reconnects": (
+        "Modbus Neuverbindungen",
+        None,
+        None,
+        SensorStateClass.TOTAL_INCREASING,
     ),
 }
-GRID_PHASE_SENSORS = {
-    "grid_l1": "Netz L1 Leistung",
-    "grid_l2": "Netz L2 Leistung",
-    "grid_l3": "Netz L3 Leistung",
+
+# Aggregate der hochfrequenten Abtastung (sampler.py)
+SAMPLE_AGGREGATE_NAMES = {
+    "min": "Minimum",
+    "max": "Maximum",
+    "mean": "Mittelwert",
 }
 
 
@@ -64,74 +103,85 @@ async def async_setup_entry(hass, entry, async_add_entities):
 
     entities = []
 
-    for key, (name, unit, device_class) in BASE_SENSORS.items():
-        entities.append(
-            E3DCSensor(
-                coordinator,
-                entry,
-                key,
-                name,
-                unit,
-                device_class,
-            )
-        )
+    # Register- und abgeleitete Sensoren aus der Register-Map
+    # (maps/*.json, registers.py)
+    register_map = coordinator.register_map
+    for key, spec in register_map.sensors.items():
+        if not coordinator.provides(key):
+            continue
+        entities.append(E3DCSensor.from_spec(coordinator, entry, key, spec))
 
-    for key, name in GRID_PHASE_SENSORS.items():
+    # Energy dashboard sensors (integrated in the coordinator, energy.py)
+    for key, name in ENERGY_SENSORS.items():
         entities.append(
-            E3DCSensor(
+            E3DCEnergySensor(
                 coordinator,
                 entry,
                 key,
                 name,
-                UnitOfPower.WATT,
-                SensorDeviceClass.POWER,
             )
         )
 
-    # DC-Strings
-    for key in DC_STRINGS.keys():
-        unit = None
-        device_class = None
-        if key.endswith("_voltage"):
-            unit = UnitOfElectricPotential.VOLT
-        elif key.endswith("_current"):
-            unit = UnitOfElectricCurrent.AMPERE
-        elif key.endswith("_power"):
-            unit = UnitOfPower.WATT
-            device_class = SensorDeviceClass.POWER
+    for key, (name, unit, device_class) in DIAGNOSTIC_SENSORS.items():
         entities.append(
-            E3DCSensor(
+            E3DCDiagnosticSensor(
                 coordinator,
                 entry,
                 key,
-                key.replace("_", " ").title(),
+                name,
                 unit,
                 device_class,
             )
         )
 
-    # Energy dashboard sensors (derived from power)
-    for key, (name, source_key, transform) in ENERGY_SENSORS.items():
+    if coordinator.sampler is not None:
+        for channel in SAMPLE_CHANNELS:
+            if channel not in register_map.fields:
+                continue
+            if not coordinator.provides(channel):
+                continue
+            channel_name = register_map.sensors.get(
+                channel, {"name": channel.replace("_", " ").title()}
+            )["name"]
+            for aggregate in AGGREGATES:
+                aggregate_name = SAMPLE_AGGREGATE_NAMES.get(
+                    aggregate, f"{aggregate[1:]}. Perzentil"
+                )
+                entities.append(
+                    E3DCSensor(
+                        coordinator,
+                        entry,
+                        f"{channel}_{aggregate}",
+                        f"{channel_name} {aggregate_name}",
+                        UnitOfPower.WATT,
+                        SensorDeviceClass.POWER,
+                    )
+                )
+
+    for key, (name, unit, device_class, state_class) in (
+        POLL_STATS_SENSORS.items()
+    ):
         entities.append(
-            E3DCEnergySensor(
+            E3DCPollStatsSensor(
                 coordinator,
                 entry,
                 key,
                 name,
-                source_key,
-                transform,
+                unit,
+                device_class,
+                state_class,
             )
         )
 
     async_add_entities(entities)
 
 
-class E3DCSensor(CoordinatorEntity, SensorEntity):
+class E3DCSensor(E3DCEntity, SensorEntity):
     def __init__(self, coordinator, entry, key, name, unit, device_class):
-        super().__init__(coordinator)
+        super().__init__(coordinator, entry, UNIT_FAMILIES.get(unit))
 
-        self._entry = entry
         self._key = key
+        self._data_keys = (key,)
 
         self._attr_name = f"E3DC {name}"
         self._attr_unique_id = f"{entry.entry_id}_{key}"
@@ -139,34 +189,67 @@ class E3DCSensor(CoordinatorEntity, SensorEntity):
         self._attr_device_class = device_class
         self._attr_state_class = SensorStateClass.MEASUREMENT
 
+    @classmethod
+    def from_spec(cls, coordinator, entry, key, spec):
+        # Entity-Metadaten einer Register-Map (Strings wie in HA)
+        device_class = spec.get("device_class")
+        if spec.get("entity_category") == EntityCategory.DIAGNOSTIC:
+            cls = E3DCDiagnosticSensor
+
+        sensor = cls(
+            coordinator,
+            entry,
+            key,
+            spec["name"],
+            spec.get("unit"),
+            SensorDeviceClass(device_class) if device_class else None,
+        )
+        if not spec.get("enabled_default", True):
+            sensor._attr_entity_registry_enabled_default = False
+        return sensor
+
+    @property
+    def available(self):
+        # Beim gestaffelten Start erst verfügbar, wenn der Wert gelesen
+        # wurde
+        return super().available and self._key in self.coordinator.data
+
     @property
     def native_value(self):
         return self.coordinator.data.get(self._key)
 
-    @property
-    def device_info(self):
-        data = self.coordinator.data
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._entry.entry_id)},
-            manufacturer=data.get("manufacturer") or "HagerEnergy / E3/DC",
-            model=data.get("model"),
-            serial_number=data.get("serial_number"),
-            sw_version=data.get("firmware_release"),
-            name="E3/DC Energiespeichersystem",
-        )
+    def _state_value(self):
+        return self.native_value
+
+
+class E3DCDiagnosticSensor(E3DCSensor):
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+
+class E3DCPollStatsSensor(E3DCDiagnosticSensor):
+    _attr_entity_registry_enabled_default = False
 
+    def __init__(
+        self, coordinator, entry, key, name, unit, device_class, state_class
+    ):
+        super().__init__(coordinator, entry, key, name, unit, device_class)
 
-class E3DCEnergySensor(CoordinatorEntity, RestoreSensor):
-    def __init__(self, coordinator, entry, key, name, source_key, transform):
-        super().__init__(coordinator)
+        self._attr_state_class = state_class
+
+
+class E3DCEnergySensor(E3DCEntity, RestoreSensor):
+    def __init__(self, coordinator, entry, key, name):
+        super().__init__(coordinator, entry, "energy")
 
-        self._entry = entry
         self._key = key
-        self._source_key = source_key
-        self._transform = transform
 
-        self._energy = None
-        self._last_update = None
+        if entry.options.get("import_statistics", False):
+            # Das Energie-Dashboard nutzt die importierte Statistik;
+            # der Zustand dient nur noch der Anzeige
+            self._write_filter = StateWriteFilter(
+                min_interval=ENERGY_STATISTICS_WRITE_INTERVAL,
+                max_interval=ENERGY_STATISTICS_WRITE_INTERVAL,
+            )
 
         self._attr_name = f"E3DC {name}"
         self._attr_unique_id = f"{entry.entry_id}_energy_{key}"
@@ -176,43 +259,21 @@ class E3DCEnergySensor(CoordinatorEntity, RestoreSensor):
 
     async def async_added_to_hass(self):
         await super().async_added_to_hass()
+        # Zählerstand aus älteren Versionen (Integration pro Entity)
+        # einmalig in die Energie-Engine übernehmen
         state = await self.async_get_last_state()
         if state and state.state not in (None, "unknown", "unavailable"):
             try:
-                self._energy = float(state.state)
+                self.coordinator.energy.seed(self._key, float(state.state))
             except ValueError:
-                self._energy = None
-        self._last_update = dt_util.utcnow()
+                pass
 
     @property
     def native_value(self):
-        if self._energy is None:
+        energy = self.coordinator.energy.totals.get(self._key)
+        if energy is None:
             return None
-        return round(self._energy, 3)
-
-    def _handle_coordinator_update(self):
-        now = dt_util.utcnow()
-        if self._last_update is not None:
-            dt_seconds = (now - self._last_update).total_seconds()
-            if dt_seconds > 0:
-                power = self.coordinator.data.get(self._source_key)
-                if power is not None:
-                    power = self._transform(power, self.coordinator.data)
-                    if self._energy is None:
-                        self._energy = 0.0
-                    self._energy += (power / 1000.0) * (dt_seconds / 3600.0)
-
-        self._last_update = now
-        self.async_write_ha_state()
+        return round(energy, 3)
 
-    @property
-    def device_info(self):
-        data = self.coordinator.data
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._entry.entry_id)},
-            manufacturer=data.get("manufacturer") or "HagerEnergy / E3/DC",
-            model=data.get("model"),
-            serial_number=data.get("serial_number"),
-            sw_version=data.get("firmware_release"),
-            name="E3/DC Energiespeichersystem",
-        )
+    def _state_value(self):
+        return self.native_value
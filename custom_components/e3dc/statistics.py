@@ -0,0 +1,84 @@
+import logging
+
+from homeassistant.components.recorder.models import (
+    StatisticData,
+    StatisticMetaData,
+)
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+)
+from homeassistant.const import UnitOfEnergy
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .energy import ENERGY_CHANNELS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def statistic_id(entry_id, key):
+    return f"{DOMAIN}:{entry_id.lower()}_{key}"
+
+
+class EnergyStatistics:
+    """Imports hourly energy sums as external long-term statistics.
+
+    After every energy sample the totals are remembered; when a sample
+    falls into a new hour, the totals of the last sample of the previous
+    hour become that hour's row. Rows are imported in one batch per
+    channel and kept until the recorder is available.
+    """
+
+    def __init__(self, hass, entry_id):
+        self._hass = hass
+        self._entry_id = entry_id
+
+        self._hour = None
+        self._last_totals = None
+        self._pending = {key: [] for key in ENERGY_CHANNELS}
+
+    def add_sample(self, totals, now=None):
+        if now is None:
+            now = dt_util.utcnow()
+        hour = now.replace(minute=0, second=0, microsecond=0)
+
+        if self._hour is not None and hour > self._hour:
+            for key, value in self._last_totals.items():
+                if key in self._pending:
+                    self._pending[key].append(
+                        StatisticData(
+                            start=self._hour,
+                            state=value,
+                            sum=value,
+                        )
+                    )
+            self.async_flush()
+
+        self._hour = hour
+        self._last_totals = dict(totals)
+
+    def async_flush(self):
+        if "recorder" not in self._hass.config.components:
+            _LOGGER.debug("Recorder not loaded, keeping energy statistics")
+            return
+
+        for key, rows in self._pending.items():
+            if not rows:
+                continue
+            async_add_external_statistics(
+                self._hass,
+                StatisticMetaData(
+                    has_mean=False,
+                    has_sum=True,
+                    name=f"E3DC {key.replace('_', ' ').title()}",
+                    source=DOMAIN,
+                    statistic_id=statistic_id(self._entry_id, key),
+                    unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+                ),
+                rows,
+            )
+            self._pending[key] = []
+
+    @property
+    def pending_hours(self):
+        return max(len(rows) for rows in self._pending.values())
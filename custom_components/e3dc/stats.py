@@ -0,0 +1,135 @@
+import bisect
+import contextvars
+
+from .const import LATENCY_BUCKETS
+
+# Zähler, die zusätzlich pro Poll ausgewiesen werden
+_POLL_COUNTERS = ("transactions", "bytes_read", "errors", "timeouts")
+
+# (Statistik, Zähler) des laufenden Polls; gilt auch in den Tasks, die
+# der Poll startet, aber nicht für Sampler oder gezielte Refreshes
+_CURRENT_POLL = contextvars.ContextVar("e3dc_poll", default=None)
+
+
+class TransportStats:
+    """Counters and latency histograms for Modbus transactions and polls.
+
+    Owned by the client (every transaction is recorded there); the
+    coordinator marks the start and end of each poll to get per-poll
+    figures. Only transactions made from within the poll's task context
+    count towards them.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self._buckets = buckets
+
+        self.totals = dict.fromkeys(_POLL_COUNTERS, 0)
+        self.lock_wait_total = 0.0
+        self.lock_wait_max = 0.0
+        self.histograms = {}
+        self.last_error = None
+
+        self.polls = 0
+        self.last_poll = {}
+        self.poll_duration_max = 0.0
+        self._poll_start = None
+        self._poll_counters = None
+        self._poll_token = None
+
+    # --------------------------------------------------
+    # Transaktionen (vom Client erfasst)
+    # --------------------------------------------------
+
+    def _count(self, key, value=1):
+        self.totals[key] += value
+        poll = self._current_poll()
+        if poll is not None:
+            poll[key] += value
+
+    def _current_poll(self):
+        current = _CURRENT_POLL.get()
+        if current is None or current[0] is not self:
+            return None
+        return current[1]
+
+    def record_transaction(self, name, seconds, registers=0):
+        self._count("transactions")
+        self._count("bytes_read", registers * 2)
+
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            # Letzter Eintrag: alles über der größten Grenze
+            histogram = self.histograms[name] = [0] * (len(self._buckets) + 1)
+        histogram[bisect.bisect_left(self._buckets, seconds * 1000)] += 1
+
+    def record_error(self, err, timeout=False):
+        # Fehlgeschlagene Anfragen zählen nicht als Transaktion
+        self._count("errors")
+        if timeout:
+            self._count("timeouts")
+        self.last_error = f"{type(err).__name__}: {err}"
+
+    def record_lock_wait(self, seconds):
+        self.lock_wait_total += seconds
+        self.lock_wait_max = max(self.lock_wait_max, seconds)
+        poll = self._current_poll()
+        if poll is not None:
+            poll["lock_wait"] += seconds
+
+    # --------------------------------------------------
+    # Polls (vom Coordinator markiert)
+    # --------------------------------------------------
+
+    def poll_started(self, now):
+        self.poll_aborted()
+        self._poll_start = now
+        counters = dict.fromkeys(_POLL_COUNTERS, 0)
+        counters["lock_wait"] = 0.0
+        self._poll_counters = counters
+        self._poll_token = _CURRENT_POLL.set((self, counters))
+
+    def poll_finished(self, now):
+        if self._poll_start is None:
+            return self.last_poll
+
+        duration = now - self._poll_start
+        self.polls += 1
+        self.poll_duration_max = max(self.poll_duration_max, duration)
+
+        self.last_poll = dict(self._poll_counters)
+        self.last_poll["duration"] = duration
+        self.poll_aborted()
+        return self.last_poll
+
+    def poll_aborted(self):
+        # Poll-Kontext verlassen (auch nach fehlgeschlagenem Poll)
+        self._poll_start = None
+        if self._poll_token is not None:
+            try:
+                _CURRENT_POLL.reset(self._poll_token)
+            except ValueError:
+                # Token aus einem anderen Kontext
+                pass
+            self._poll_token = None
+
+    def as_dict(self):
+        bounds = [f"<={bound}ms" for bound in self._buckets]
+        bounds.append(f">{self._buckets[-1]}ms")
+
+        return {
+            "polls": self.polls,
+            "last_poll": {
+                key: round(value, 4) if isinstance(value, float) else value
+                for key, value in self.last_poll.items()
+            },
+            "poll_duration_max": round(self.poll_duration_max, 4),
+            "totals": dict(self.totals),
+            "lock_wait_total": round(self.lock_wait_total, 4),
+            "lock_wait_max": round(self.lock_wait_max, 4),
+            "last_error": self.last_error,
+            "latency_buckets": bounds,
+            "latency_histograms": {
+                name: list(histogram)
+                for name, histogram in sorted(self.histograms.items())
+            },
+        }
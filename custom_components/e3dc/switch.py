@@ -1,15 +1,13 @@
 import logging
 
 from homeassistant.components.switch import SwitchEntity
-from homeassistant.helpers.entity import DeviceInfo
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import (
     DOMAIN,
-    WALLBOX_BASE_ADDR,
     WALLBOX_TYPES,
     MAX_WALLBOXES,
 )
+from .entity import E3DCEntity
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -17,7 +15,11 @@ _LOGGER = logging.getLogger(__name__)
 async def async_setup_entry(hass, entry, async_add_entities):
     data = hass.data[DOMAIN][entry.entry_id]
     coordinator = data["coordinator"]
-    client = data["client"]
+    commander = data["wallbox"]
+
+    if not coordinator.supports_write:
+        # Transport ohne Registerzugriff (RSCP): keine Wallbox-Schalter
+        return
 
     wallboxes = entry.options.get(
         "wallboxes",
@@ -34,7 +36,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
             entities.append(
                 E3DCWallboxSwitch(
                     coordinator=coordinator,
-                    client=client,
+                    commander=commander,
                     entry=entry,
                     wallbox_index=wb,
                     key=key,
@@ -45,17 +47,17 @@ async def async_setup_entry(hass, entry, async_add_entities):
     async_add_entities(entities)
 
 
-class E3DCWallboxSwitch(CoordinatorEntity, SwitchEntity):
-    def __init__(self, coordinator, client, entry, wallbox_index, key, bit):
-        super().__init__(coordinator)
+class E3DCWallboxSwitch(E3DCEntity, SwitchEntity):
+    def __init__(
+        self, coordinator, commander, entry, wallbox_index, key, bit
+    ):
+        super().__init__(coordinator, entry)
 
-        self._client = client
-        self._entry = entry
+        self._commander = commander
         self._wallbox = wallbox_index
         self._key = key
         self._bit = bit
-
-        self._addr = WALLBOX_BASE_ADDR + wallbox_index
+        self._data_keys = (f"wallbox_ctrl_{wallbox_index}",)
 
         self._attr_name = (
             f"E3DC Wallbox {wallbox_index} {key.replace('_', ' ').title()}"
@@ -70,17 +72,19 @@ class E3DCWallboxSwitch(CoordinatorEntity, SwitchEntity):
 
     @property
     def is_on(self):
-        # Status immer live aus dem Register lesen
+        # Registerwert der letzten Abfrage bzw. optimistisch geschriebener
+        # Wert bis zur Bestätigung
         try:
-            value = self.coordinator.data.get(
-                f"wallbox_ctrl_{self._wallbox}"
-            )
+            value = self._commander.ctrl_value(self._wallbox)
             if value is None:
                 return None
             return bool(value & (1 << self._bit))
         except Exception:
             return None
 
+    def _state_value(self):
+        return self.is_on
+
     # --------------------------------------------------
     # Control
     # --------------------------------------------------
@@ -93,27 +97,13 @@ class E3DCWallboxSwitch(CoordinatorEntity, SwitchEntity):
 
     async def _async_set_state(self, state: bool):
         try:
-            # aktuellen Registerwert lesen
-            regs = await self._client.read_holding_registers(
-                self._addr,
-                1,
-            )
-            current = regs[0]
-
-            new_value = (
-                current | (1 << self._bit)
-                if state
-                else current & ~(1 << self._bit)
+            # Schreibvorgang ohne vorheriges Lesen; Änderungen mehrerer
+            # Schalter derselben Wallbox werden zusammengefasst
+            await self._commander.async_set_bit(
+                self._wallbox,
+                self._bit,
+                state,
             )
-
-            if new_value != current:
-                await self._client.write_register(
-                    self._addr,
-                    new_value,
-                )
-
-            await self.coordinator.async_request_refresh()
-
         except Exception as err:
             _LOGGER.error(
                 "Wallbox %s (%s) write failed: %s",
@@ -122,19 +112,3 @@ class E3DCWallboxSwitch(CoordinatorEntity, SwitchEntity):
                 err,
             )
             raise
-
-    # --------------------------------------------------
-    # Device
-    # --------------------------------------------------
-
-    @property
-    def device_info(self):
-        data = self.coordinator.data
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._entry.entry_id)},
-            manufacturer=data.get("manufacturer") or "HagerEnergy / E3/DC",
-            model=data.get("model"),
-            serial_number=data.get("serial_number"),
-            sw_version=data.get("firmware_release"),
-            name="E3/DC Energiespeichersystem",
-        )
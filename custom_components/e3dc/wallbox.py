@@ -0,0 +1,188 @@
+import asyncio
+import logging
+
+from homeassistant.core import callback
+
+from .const import (
+    WALLBOX_BASE_ADDR,
+    WALLBOX_WRITE_WINDOW,
+    WALLBOX_VERIFY_DELAY,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _PendingWrite:
+    def __init__(self, future):
+        self.future = future
+        self.handle = None
+        self.set_mask = 0
+        self.clear_mask = 0
+
+
+class WallboxCommander:
+    """Coalesces wallbox CTRL bit changes into one write per wallbox.
+
+    Bit changes arriving within ``window`` seconds are merged and written
+    once, based on the coordinator's cached register value (no read
+    before write). The new value is shown optimistically until a
+    targeted refresh of only that register confirms or corrects it.
+    """
+
+    def __init__(
+        self,
+        hass,
+        coordinator,
+        client,
+        window=WALLBOX_WRITE_WINDOW,
+        verify_delay=WALLBOX_VERIFY_DELAY,
+    ):
+        self._hass = hass
+        self._coordinator = coordinator
+        self._client = client
+        self._window = window
+        self._verify_delay = verify_delay
+
+        self._pending = {}
+        self._optimistic = {}
+        # Schreibvorgänge je Wallbox nacheinander, damit ein Fenster auf
+        # dem Ergebnis des vorherigen aufbaut
+        self._locks = {}
+        # Laufende Schreib-/Prüfvorgänge und Listener (async_shutdown)
+        self._tasks = set()
+        self._poll_listeners = set()
+
+    def ctrl_value(self, wallbox):
+        value = self._optimistic.get(wallbox)
+        if value is None:
+            value = self._coordinator.data.get(f"wallbox_ctrl_{wallbox}")
+        return value
+
+    async def async_set_bit(self, wallbox, bit, state):
+        pending = self._pending.get(wallbox)
+        if pending is None:
+            pending = self._pending[wallbox] = _PendingWrite(
+                self._hass.loop.create_future()
+            )
+            pending.handle = self._hass.loop.call_later(
+                self._window,
+                lambda: self._create_task(self._async_flush(wallbox)),
+            )
+
+        mask = 1 << bit
+        if state:
+            pending.set_mask |= mask
+            pending.clear_mask &= ~mask
+        else:
+            pending.clear_mask |= mask
+            pending.set_mask &= ~mask
+
+        # Alle Aufrufer dieses Fensters warten auf denselben Schreibvorgang
+        await asyncio.shield(pending.future)
+
+    def _create_task(self, coro):
+        task = self._hass.async_create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def async_shutdown(self):
+        # Vor dem Schließen des Clients aufrufen: nichts darf danach die
+        # Verbindung wieder aufbauen
+        pending, self._pending = self._pending, {}
+        for write in pending.values():
+            write.handle.cancel()
+            write.future.cancel()
+
+        for remove in list(self._poll_listeners):
+            remove()
+        self._poll_listeners.clear()
+
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _async_flush(self, wallbox):
+        pending = self._pending.pop(wallbox)
+        lock = self._locks.setdefault(wallbox, asyncio.Lock())
+        try:
+            async with lock:
+                await self._async_write(wallbox, pending)
+        finally:
+            # Abgebrochen (async_shutdown): Aufrufer nicht hängen lassen
+            if not pending.future.done():
+                pending.future.cancel()
+
+    async def _async_write(self, wallbox, pending):
+        addr = WALLBOX_BASE_ADDR + wallbox
+
+        try:
+            # Enthält den optimistischen Wert eines vorherigen Fensters
+            current = self.ctrl_value(wallbox)
+            if current is None:
+                # Noch kein Wert bekannt: einmalig lesen
+                regs = await self._client.read_holding_registers(addr, 1)
+                current = regs[0]
+
+            new_value = (current | pending.set_mask) & ~pending.clear_mask
+            if new_value != current:
+                await self._client.write_register(addr, new_value)
+        except Exception as err:
+            pending.future.set_exception(err)
+            return
+
+        pending.future.set_result(None)
+
+        self._optimistic[wallbox] = new_value
+        self._coordinator.async_update_key_listeners(
+            [f"wallbox_ctrl_{wallbox}"]
+        )
+
+        self._create_task(self._async_verify(wallbox, new_value))
+
+    async def _async_verify(self, wallbox, expected):
+        await asyncio.sleep(self._verify_delay)
+
+        key = f"wallbox_ctrl_{wallbox}"
+        try:
+            await self._coordinator.async_refresh_keys([key])
+        except Exception as err:
+            _LOGGER.debug("Wallbox %s verification failed: %s", wallbox, err)
+            # Optimistischen Wert bis zur nächsten erfolgreichen Abfrage
+            # behalten
+            self._clear_after_poll(wallbox, expected)
+            return
+
+        value = self._coordinator.data.get(key)
+        if value is not None and value != expected:
+            _LOGGER.warning(
+                "Wallbox %s CTRL is 0x%04x after writing 0x%04x",
+                wallbox,
+                value,
+                expected,
+            )
+
+        self._clear_optimistic(wallbox, expected)
+
+    def _clear_optimistic(self, wallbox, expected):
+        # Nur zurücksetzen, wenn nicht inzwischen neu geschrieben wurde
+        if self._optimistic.get(wallbox) == expected:
+            self._optimistic.pop(wallbox)
+        self._coordinator.async_update_key_listeners(
+            [f"wallbox_ctrl_{wallbox}"]
+        )
+
+    def _clear_after_poll(self, wallbox, expected):
+        remove = None
+
+        @callback
+        def poll_done():
+            if not self._coordinator.last_update_success:
+                return
+            remove()
+            self._poll_listeners.discard(remove)
+            self._clear_optimistic(wallbox, expected)
+
+        remove = self._coordinator.async_add_listener(poll_done)
+        self._poll_listeners.add(remove)